@@ -1,34 +1,80 @@
+import importlib
+import os
+import threading
+
 from kivy.uix.screenmanager import ScreenManager
 from kivymd.app import MDApp
 from kivymd.uix.label import MDLabel
 from kivymd.uix.snackbar import MDSnackbar
 from kivy.metrics import sp
+from kivy.logger import Logger
+from kivy.clock import Clock
 
+from profiler import profiler
 from screens.assets.config_chinese import register_chinese_font, set_kivymd_global_font
 from screens.components.models import ShoppingCart, OrderManager, InventoryManager, Database
+from screens.components.storage import open_storage
 from screens.login_screen import LoginScreen, UserManager
-from screens.home_screen import HomeScreen
-from screens.product_screen import ProductScreen
-from screens.cart_screen import CartScreen
-from screens.checkout_screen import CheckoutScreen
-from screens.profile_screen import ProfileScreen
-from screens.orders_screen import OrdersScreen
-from screens.inventory_screen import InventoryScreen
 
 from kivy.config import Config
 Config.set('input', 'keyboard_mode', 'system')
 
+# 屏幕名 -> (模块, 类名)；除登录页外，首次切换到该屏幕时才导入模块并创建
+SCREENS = {
+    "home": ("screens.home_screen", "HomeScreen"),
+    "products": ("screens.product_screen", "ProductScreen"),
+    "cart": ("screens.cart_screen", "CartScreen"),
+    "checkout": ("screens.checkout_screen", "CheckoutScreen"),
+    "profile": ("screens.profile_screen", "ProfileScreen"),
+    "orders": ("screens.orders_screen", "OrdersScreen"),
+    "inventory": ("screens.inventory_screen", "InventoryScreen"),
+}
+
+
+class LazyManager:
+    """首次访问时才创建的管理器属性
+
+    创建后保存到实例字典中，之后的访问不再经过这里；每个属性有自己的锁，
+    后台预加载线程和界面线程同时访问时只会创建一次。
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._lock = threading.RLock()
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, app, owner=None):
+        if app is None:
+            return self
+        with self._lock:
+            if self.name not in app.__dict__:
+                with profiler.phase(f"load {self.name}"):
+                    app.__dict__[self.name] = self.factory(app)
+            return app.__dict__[self.name]
+
+    def is_loaded(self, app):
+        return self.name in app.__dict__
+
 
 class ShoppingCartApp(MDApp):
+    # 商品、订单、库存和用户数据在首次访问时才加载
+    db = LazyManager(lambda app: Database(storage=app.storage))
+    order_manager = LazyManager(lambda app: OrderManager(storage=app.storage))
+    inventory_manager = LazyManager(lambda app: InventoryManager(app.db, storage=app.storage))
+    user_manager = LazyManager(lambda app: UserManager(storage=app.storage))
+
+    # 登录页显示后在后台按顺序预加载（环境变量 SHOPPING_CART_PREFETCH=0 时关闭）
+    PREFETCH = ("user_manager", "db", "inventory_manager", "order_manager")
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.db = Database()
+        # 存储后端（环境变量 SHOPPING_CART_STORAGE=sqlite 时使用SQLite），默认在后台线程中写入
+        self.storage = open_storage()
+        self.storage.on_error = self.on_storage_error
         self.cart = ShoppingCart()
-        self.order_manager = OrderManager()
-        self.inventory_manager = InventoryManager(self.db)
         self.screen_manager = None
-        # 用户管理器
-        self.user_manager = UserManager()
         self.user_info = None
         self.current_user = None
 
@@ -39,55 +85,65 @@ class ShoppingCartApp(MDApp):
         self.theme_cls.accent_palette = "Orange"
 
         # 1. 注册中文字体（全局仅需调用一次）
-        register_chinese_font()
+        with profiler.phase("register_chinese_font"):
+            register_chinese_font()
 
         # 2. 设置KivyMD全局字体（所有控件自动使用中文字体）
-        set_kivymd_global_font(self.theme_cls)
+        with profiler.phase("set_kivymd_global_font"):
+            set_kivymd_global_font(self.theme_cls)
 
-        # 3. 创建屏幕管理器, 添加各个页面
+        # 3. 创建屏幕管理器，启动时只添加登录页，其它页面在首次显示时创建
         self.screen_manager = ScreenManager(size=(sp(450), sp(800)))
-        self.screen_manager.add_widget(LoginScreen())
-        self.screen_manager.add_widget(HomeScreen())
-        self.screen_manager.add_widget(ProductScreen())
-        self.screen_manager.add_widget(CartScreen())
-        self.screen_manager.add_widget(CheckoutScreen())
-        self.screen_manager.add_widget(ProfileScreen())
-        self.screen_manager.add_widget(OrdersScreen())
-        self.screen_manager.add_widget(InventoryScreen())
+        with profiler.phase("screen login"):
+            self.screen_manager.add_widget(LoginScreen())
 
         return self.screen_manager
 
+    def get_screen(self, name):
+        """获取屏幕，尚未创建时导入对应模块并创建"""
+        if not self.screen_manager.has_screen(name):
+            module_name, class_name = SCREENS[name]
+            with profiler.phase(f"screen {name}"):
+                screen_class = getattr(importlib.import_module(module_name), class_name)
+                self.screen_manager.add_widget(screen_class())
+        return self.screen_manager.get_screen(name)
+
+    def show_screen(self, name):
+        """切换到指定屏幕"""
+        self.get_screen(name)
+        self.screen_manager.current = name
+
     def show_login(self):
         """显示登录界面"""
-        self.screen_manager.current = "login"
+        self.show_screen("login")
 
     def show_home(self):
         """显示主页"""
-        self.screen_manager.current = "home"
+        self.show_screen("home")
 
     def show_products(self):
         """显示商品界面"""
-        self.screen_manager.current = "products"
+        self.show_screen("products")
 
     def show_cart(self):
         """显示购物车界面"""
-        self.screen_manager.current = "cart"
+        self.show_screen("cart")
 
     def show_checkout(self):
         """显示结算界面"""
-        self.screen_manager.current = "checkout"
+        self.show_screen("checkout")
 
     def show_profile(self):
         """显示个人中心"""
-        self.screen_manager.current = "profile"
+        self.show_screen("profile")
 
     def show_orders(self):
         """显示订单管理"""
-        self.screen_manager.current = "orders"
+        self.show_screen("orders")
 
     def show_inventory(self):
         """显示库存管理"""
-        self.screen_manager.current = "inventory"
+        self.show_screen("inventory")
 
     def add_to_cart(self, product_id):
         """添加商品到购物车"""
@@ -99,13 +155,8 @@ class ShoppingCartApp(MDApp):
                 ).open()
                 return False
 
+            # 购物车界面和徽章通过购物车变化事件更新
             self.cart.add_item(product, 1)
-            # 更新购物车界面
-            cart_screen = self.screen_manager.get_screen("cart")
-            cart_screen.update_cart()
-            # 更新商品界面 购物车徽章
-            product_screen = self.screen_manager.get_screen("products")
-            product_screen.update_badge_color_text(self.cart.item_count)
 
             # 显示成功消息
             MDSnackbar(
@@ -124,17 +175,15 @@ class ShoppingCartApp(MDApp):
             MDSnackbar(
                 MDLabel(text=f"库存不足，最多可购买 {product.stock} 件", text_color=(0.9, 0.2, 0.2, 1))
             ).open()
+            # 恢复购物车界面中的数量
+            self.get_screen("cart").update_cart()
             return
 
         self.cart.update_quantity(product_id, quantity)
-        cart_screen = self.screen_manager.get_screen("cart")
-        cart_screen.update_cart()
 
     def remove_from_cart(self, product_id):
         """从购物车移除商品"""
         self.cart.remove_item(product_id)
-        cart_screen = self.screen_manager.get_screen("cart")
-        cart_screen.update_cart()
 
     def complete_order(self, order_data):
         """完成订单"""
@@ -155,19 +204,20 @@ class ShoppingCartApp(MDApp):
             created_at=order_data['order_time']
         )
 
-        # 添加到订单管理器
-        self.order_manager.add_order(order)
-
-        # 更新商品库存
+        # 计算各商品的库存扣减量
+        deltas = {}
         for item in order_data['items']:
-            product = self.db.get_product(item['product_id'])
-            if product:
-                # 扣减库存
-                new_stock = product.stock - item['quantity']
-                if new_stock < 0:
-                    new_stock = 0
-                """ 库存管理, 不更新库存量 """
-                self.inventory_manager.update_product_stock(product.id, new_stock)
+            if self.db.get_product(item['product_id']):
+                deltas[item['product_id']] = deltas.get(item['product_id'], 0) - item['quantity']
+
+        # 订单与库存在同一事务中提交，失败时恢复内存中的订单和库存
+        try:
+            with self.storage.transaction():
+                self.order_manager.add_order(order)
+                self.inventory_manager.update_stocks(deltas)
+        except Exception as e:
+            Logger.warning(f"提交订单失败: {e}")
+            return None
 
         # 清空购物车
         self.cart.clear()
@@ -178,3 +228,38 @@ class ShoppingCartApp(MDApp):
         """应用启动时执行"""
         # 设置初始屏幕
         self.show_login()
+        if profiler.enabled:
+            from kivy.core.window import Window
+            Window.bind(on_flip=self._on_first_frame)
+        if os.environ.get("SHOPPING_CART_PREFETCH", "1") != "0":
+            Clock.schedule_once(lambda dt: self.start_prefetch())
+
+    def _on_first_frame(self, *args):
+        """首帧显示后写入启动性能报告"""
+        from kivy.core.window import Window
+        Window.unbind(on_flip=self._on_first_frame)
+        profiler.mark("first_frame")
+        path = profiler.finish()
+        Logger.info(f"启动性能报告: {path}")
+
+    def start_prefetch(self):
+        """在后台线程中预加载各管理器"""
+        threading.Thread(target=self._prefetch, name="prefetch", daemon=True).start()
+
+    def _prefetch(self):
+        for name in self.PREFETCH:
+            try:
+                getattr(self, name)
+            except Exception as e:
+                Logger.warning(f"预加载 {name} 失败: {e}")
+
+    def on_storage_error(self, error, tables):
+        """后台保存失败时提示（在主线程中调用）"""
+        MDSnackbar(MDLabel(text=f"数据保存失败: {error}", text_color=(0.9, 0.2, 0.2, 1))).open()
+
+    def on_stop(self):
+        """应用退出时执行"""
+        # 写入延迟保存的用户数据，再等待后台写入全部完成、落盘并关闭存储
+        if ShoppingCartApp.user_manager.is_loaded(self):
+            self.user_manager.flush()
+        self.storage.close()
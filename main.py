@@ -5,7 +5,14 @@ cur_dir = Path(__file__).parent  # current directory
 sys.path.extend([str(cur_dir.parent.parent), str(cur_dir.parent), str(cur_dir)])
 
 
-from app import ShoppingCartApp
+# 启动性能分析（环境变量 SHOPPING_CART_PROFILE=1 时启用），需在导入 kivy 之前开始
+from profiler import profiler
+profiler.install()
+
+with profiler.phase("import app"):
+    from app import ShoppingCartApp
 
 if __name__ == '__main__':
-    ShoppingCartApp().run()
+    with profiler.phase("ShoppingCartApp.__init__"):
+        app = ShoppingCartApp()
+    app.run()
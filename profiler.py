@@ -0,0 +1,130 @@
+"""启动性能分析
+
+设置环境变量 SHOPPING_CART_PROFILE=1 启用，记录启动各阶段耗时（模块导入、字体注册、
+各管理器加载、各屏幕创建、首帧显示），首帧显示后写入 JSON 报告：
+    SHOPPING_CART_PROFILE_FILE 报告路径，默认 data/startup_profile.json
+启用时同时统计每个模块的导入耗时（类似 python -X importtime 的自身/累计耗时）；
+SHOPPING_CART_PROFILE=cprofile 时额外用 cProfile 采样，结果保存在报告旁的 .prof 文件中，
+可用 python -m pstats 查看。
+"""
+import builtins
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+PROFILE_ENV = "SHOPPING_CART_PROFILE"
+REPORT_ENV = "SHOPPING_CART_PROFILE_FILE"
+DEFAULT_REPORT = str(Path(__file__).parent) + "/data/startup_profile.json"
+
+
+class StartupProfiler:
+    """启动阶段计时器（未启用时各方法几乎没有开销）"""
+
+    def __init__(self, mode: str = ""):
+        self.mode = mode.lower()
+        self.enabled = self.mode not in ("", "0", "false")
+        self.started = time.perf_counter()
+        self.started_at = datetime.now().isoformat()
+        self.phases = []
+        self.marks = {}
+        self.imports = {}  # 模块名 -> [自身耗时, 累计耗时]
+        self.finished = False
+        self._lock = threading.Lock()
+        self._import_stack = []
+        self._original_import = None
+        self._cprofile = None
+
+    def install(self):
+        """开始统计模块导入耗时，按需启动 cProfile（应在导入 kivy 之前调用）"""
+        if not self.enabled or self._original_import is not None:
+            return
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+        if self.mode == "cprofile":
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # 只统计主线程中首次导入的模块，已导入的模块直接走原来的 __import__
+        if (level or name in sys.modules
+                or threading.current_thread() is not threading.main_thread()):
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        self._import_stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self._import_stack.pop()
+            if self._import_stack:
+                self._import_stack[-1] += elapsed
+            self.imports[name] = [elapsed - children, elapsed]
+
+    @contextmanager
+    def phase(self, name: str):
+        """记录一个阶段的开始时间和耗时"""
+        if not self.enabled or self.finished:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.phases.append({
+                    'name': name,
+                    'thread': threading.current_thread().name,
+                    'start': round(start - self.started, 6),
+                    'duration': round(end - start, 6),
+                })
+
+    def mark(self, name: str):
+        """记录一个时间点（如首帧显示）"""
+        if self.enabled and not self.finished:
+            self.marks[name] = round(time.perf_counter() - self.started, 6)
+
+    def report(self) -> dict:
+        imports = sorted(self.imports.items(), key=lambda item: item[1][1], reverse=True)
+        return {
+            'started_at': self.started_at,
+            'python': sys.version.split()[0],
+            'platform': sys.platform,
+            'marks': self.marks,
+            'phases': self.phases,
+            'imports': [
+                {'module': name, 'self': round(own, 6), 'cumulative': round(total, 6)}
+                for name, (own, total) in imports
+            ],
+        }
+
+    def finish(self, path: str = None):
+        """停止统计并写入报告，返回报告路径"""
+        if not self.enabled or self.finished:
+            return None
+        self.finished = True
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+        path = path or os.environ.get(REPORT_ENV) or DEFAULT_REPORT
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        report = self.report()
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            prof_path = os.path.splitext(path)[0] + ".prof"
+            self._cprofile.dump_stats(prof_path)
+            report['cprofile'] = prof_path
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return path
+
+
+profiler = StartupProfiler(os.environ.get(PROFILE_ENV, ""))
@@ -1,56 +1,127 @@
 # configs/font_config.py
+import os
+from pathlib import Path
+
 # 全局共享的中文字体名称（所有文件统一使用这个名称）
 CHINESE_FONT_NAME = "ChineseFont"
 
 # 字体文件路径（项目根目录下的fonts文件夹）
 FONT_FILE_PATH = "./screens/assets/fonts/msyhbd.ttc"
 
+# 由 build_subset_font 生成的子集字体（只包含应用用到的字符和常用汉字，加载更快、占用内存更少）
+SUBSET_FONT_PATH = "./screens/assets/fonts/msyhbd-subset.ttf"
+
+# 覆盖KivyMD所有默认字体样式，统一使用中文字体（预先计算，启动时直接整体更新）
+FONT_STYLES = {
+    "H5": [CHINESE_FONT_NAME, 24, False, 0],
+    "H6": [CHINESE_FONT_NAME, 20, False, 0.15],
+    "Headline1": [CHINESE_FONT_NAME, 96, False, -0.015625],
+    "Headline2": [CHINESE_FONT_NAME, 60, False, -0.008333333333333333],
+    "Headline3": [CHINESE_FONT_NAME, 48, False, 0],
+    "Headline4": [CHINESE_FONT_NAME, 34, False, 0.007352941176470588],
+    "Headline5": [CHINESE_FONT_NAME, 24, False, 0],
+    "Headline6": [CHINESE_FONT_NAME, 20, False, 0.0125],
+    "Subtitle1": [CHINESE_FONT_NAME, 16, False, 0.009375],
+    "Subtitle2": [CHINESE_FONT_NAME, 14, False, 0.007142857142857143],
+    "Body1": [CHINESE_FONT_NAME, 16, False, 0.03125],
+    "Body2": [CHINESE_FONT_NAME, 14, False, 0.017857142857142856],
+    "Button": [CHINESE_FONT_NAME, 14, True, 0.08928571428571429],
+    "Caption": [CHINESE_FONT_NAME, 12, False, 0.041666666666666664],
+    "Overline": [CHINESE_FONT_NAME, 10, False, 0.05],
+    "Title": [CHINESE_FONT_NAME, 16, False, 0.05],
+    # 关键：新增TopAppBar标题专用样式（部分KivyMD版本需要）
+    "TopAppBarTitle": [CHINESE_FONT_NAME, 20, False, 0.0125],
+    "TopAppBarActionButton": [CHINESE_FONT_NAME, 14, True, 0.08928571428571429],
+    # 关键：新增MDDialog标题专用样式
+    "DialogTitle": [CHINESE_FONT_NAME, 20, False, 0.0125],  # 匹配标题默认大小
+    "DialogContent": [CHINESE_FONT_NAME, 14, False, 0.017857142857142856],  # 顺带覆盖对话框内容文字
+}
+
+_registered = False
+
+
+def chinese_font_file():
+    """实际使用的字体文件：子集字体存在且不旧于原字体时使用子集字体"""
+    try:
+        if os.path.getmtime(SUBSET_FONT_PATH) >= os.path.getmtime(FONT_FILE_PATH):
+            return SUBSET_FONT_PATH
+    except OSError:
+        pass
+    return FONT_FILE_PATH
+
 
 def register_chinese_font():
-    """注册中文字体（全局仅需调用一次）"""
+    """注册中文字体（全局仅需调用一次，重复调用直接返回）"""
+    global _registered
+    if _registered:
+        return
     from kivy.core.text import LabelBase
 
     # 注册字体（名称使用全局共享的CHINESE_FONT_NAME）
     LabelBase.register(
         name=CHINESE_FONT_NAME,
-        fn_regular=FONT_FILE_PATH
+        fn_regular=chinese_font_file()
     )
+    _registered = True
 
 
 def set_kivymd_global_font(theme_cls):
     """配置KivyMD全局字体样式（所有控件生效）"""
-    # 覆盖KivyMD所有默认字体样式，统一使用中文字体
-    font_styles = {
-        "H5": [CHINESE_FONT_NAME, 24, False, 0],
-        "H6": [CHINESE_FONT_NAME, 20, False, 0.15],
-        "Headline1": [CHINESE_FONT_NAME, 96, False, -0.015625],
-        "Headline2": [CHINESE_FONT_NAME, 60, False, -0.008333333333333333],
-        "Headline3": [CHINESE_FONT_NAME, 48, False, 0],
-        "Headline4": [CHINESE_FONT_NAME, 34, False, 0.007352941176470588],
-        "Headline5": [CHINESE_FONT_NAME, 24, False, 0],
-        "Headline6": [CHINESE_FONT_NAME, 20, False, 0.0125],
-        "Subtitle1": [CHINESE_FONT_NAME, 16, False, 0.009375],
-        "Subtitle2": [CHINESE_FONT_NAME, 14, False, 0.007142857142857143],
-        "Body1": [CHINESE_FONT_NAME, 16, False, 0.03125],
-        "Body2": [CHINESE_FONT_NAME, 14, False, 0.017857142857142856],
-        "Button": [CHINESE_FONT_NAME, 14, True, 0.08928571428571429],
-        "Caption": [CHINESE_FONT_NAME, 12, False, 0.041666666666666664],
-        "Overline": [CHINESE_FONT_NAME, 10, False, 0.05],
-        "Title": [CHINESE_FONT_NAME, 16, False, 0.05],
-        # 关键：新增TopAppBar标题专用样式（部分KivyMD版本需要）
-        "TopAppBarTitle": [CHINESE_FONT_NAME, 20, False, 0.0125],
-        "TopAppBarActionButton": [CHINESE_FONT_NAME, 14, True, 0.08928571428571429],
-        # 关键：新增MDDialog标题专用样式
-        "DialogTitle": [CHINESE_FONT_NAME, 20, False, 0.0125],  # 匹配标题默认大小
-        "DialogContent": [CHINESE_FONT_NAME, 14, False, 0.017857142857142856],  # 顺带覆盖对话框内容文字
-    }
-
-    # 给theme_cls赋值，覆盖默认字体样式
-    for style_name, style_config in font_styles.items():
-        theme_cls.font_styles[style_name] = style_config
+    # 给theme_cls赋值，一次性覆盖默认字体样式
+    theme_cls.font_styles.update(FONT_STYLES)
 
     # # 3. 关键兜底：设置默认字体（解决未指定font_style的MDLabel乱码）
     # theme_cls.default_font = CHINESE_FONT_NAME
     # # 额外：覆盖Kivy的全局默认字体（双重兜底，确保万无一失）
     # from kivy.config import Config
     # Config.set('kivy', 'default_font', [CHINESE_FONT_NAME, FONT_FILE_PATH])
+
+
+def collect_app_text(root: str = None) -> str:
+    """收集应用源码和数据文件中出现的所有非 ASCII 字符"""
+    root = Path(root or Path(__file__).parent.parent.parent)
+    chars = set()
+    for pattern in ("*.py", "screens/**/*.py", "data/*.json"):
+        for path in root.glob(pattern):
+            try:
+                chars.update(ch for ch in path.read_text(encoding='utf-8') if ord(ch) > 127)
+            except (OSError, UnicodeDecodeError):
+                continue
+    return "".join(sorted(chars))
+
+
+def common_chinese_text() -> str:
+    """GB2312 中的全部汉字和符号（保证用户新输入的常用字也能显示）"""
+    chars = []
+    for code in range(0x3000, 0xFFFF):
+        ch = chr(code)
+        try:
+            ch.encode('gb2312')
+        except UnicodeEncodeError:
+            continue
+        chars.append(ch)
+    return "".join(chars)
+
+
+def build_subset_font(output: str = SUBSET_FONT_PATH, extra_text: str = "") -> str:
+    """用 fontTools 从原字体生成只包含 ASCII、常用汉字和应用文字的子集字体"""
+    from fontTools import subset
+
+    options = subset.Options()
+    options.font_number = 0  # .ttc 字体集合中的第一个字体
+    options.layout_features = ["*"]
+    font = subset.load_font(FONT_FILE_PATH, options)
+
+    text = "".join(chr(code) for code in range(32, 127)) + common_chinese_text() + collect_app_text() + extra_text
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(text=text)
+    subsetter.subset(font)
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    subset.save_font(font, output, options)
+    return output
+
+
+if __name__ == "__main__":
+    # 在项目根目录运行：python screens/assets/config_chinese.py
+    print(f"子集字体已生成: {build_subset_font()}")
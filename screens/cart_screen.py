@@ -8,6 +8,8 @@ from kivymd.uix.snackbar import MDSnackbar
 from kivymd.uix.toolbar import MDTopAppBar
 from kivy.metrics import dp, sp
 
+from .components.cart_item import CartItemWidget
+
 
 class CartScreen(Screen):
     total_price = NumericProperty(0)
@@ -15,8 +17,13 @@ class CartScreen(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.name = "cart"
+        # product_id -> CartItemWidget，更新时只处理有变化的商品
+        self._item_widgets = {}
         self._build_ui()
 
+        from kivy.app import App
+        App.get_running_app().cart.subscribe(self.on_cart_changed)
+
     def _build_ui(self):
         # 主布局
         main_layout = MDBoxLayout(orientation='vertical')
@@ -93,12 +100,61 @@ class CartScreen(Screen):
         self.update_cart()
 
     def update_cart(self):
-        """更新购物车显示"""
+        """按购物车内容同步全部商品组件"""
+        from kivy.app import App
+        app = App.get_running_app()
+
+        # 移除已不在购物车中的商品
+        items = app.cart.items
+        for product_id in [pid for pid in self._item_widgets if pid not in items]:
+            self.cart_layout.remove_widget(self._item_widgets.pop(product_id))
+
+        # 新增的商品创建组件，已有的只更新数量
+        for product_id, item in items.items():
+            cart_item = self._item_widgets.get(product_id)
+            if cart_item is None:
+                self._add_item_widget(item)
+            else:
+                cart_item.set_quantity(item.quantity)
+
+        self.update_summary()
+
+    def on_cart_changed(self, event, product_id):
+        """购物车变化时只更新对应的商品组件"""
         from kivy.app import App
         app = App.get_running_app()
 
-        # 清空现有内容
-        self.cart_layout.clear_widgets()
+        if event == 'add':
+            self._add_item_widget(app.cart.items[product_id])
+        elif event == 'update':
+            cart_item = self._item_widgets.get(product_id)
+            if cart_item is not None:
+                cart_item.set_quantity(app.cart.items[product_id].quantity)
+        elif event == 'remove':
+            cart_item = self._item_widgets.pop(product_id, None)
+            if cart_item is not None:
+                self.cart_layout.remove_widget(cart_item)
+        elif event == 'clear':
+            self.cart_layout.clear_widgets()
+            self._item_widgets.clear()
+
+        self.update_summary()
+
+    def _add_item_widget(self, item):
+        cart_item = CartItemWidget(
+            product_id=item.product_id,
+            name=item.product_name,
+            price=item.price,
+            quantity=item.quantity,
+            image_url=item.image
+        )
+        self._item_widgets[item.product_id] = cart_item
+        self.cart_layout.add_widget(cart_item)
+
+    def update_summary(self):
+        """更新总价和结算按钮"""
+        from kivy.app import App
+        app = App.get_running_app()
 
         # 检查购物车是否为空
         if app.cart.item_count == 0:
@@ -115,18 +171,6 @@ class CartScreen(Screen):
 
         self.empty_label.opacity = 0
 
-        # 添加购物车项
-        for item in app.cart.items.values():
-            from .components.cart_item import CartItemWidget
-            cart_item = CartItemWidget(
-                product_id=item.product_id,
-                name=item.product_name,
-                price=item.price,
-                quantity=item.quantity,
-                image_url=item.image
-            )
-            self.cart_layout.add_widget(cart_item)
-
         # 更新总价
         self.total_label.text = f"数量：{app.cart.item_count}\n总价: ¥{app.cart.total:.1f}"
 
@@ -13,7 +13,7 @@ from kivymd.uix.scrollview import MDScrollView
 from kivy.metrics import dp
 
 from .assets.config_chinese import CHINESE_FONT_NAME
-from .orders_screen import OrdersScreen
+from .components.money import to_cents
 
 
 class CheckoutScreen(Screen):
@@ -22,6 +22,9 @@ class CheckoutScreen(Screen):
         self.name = "checkout"
         self._build_ui()
 
+        from kivy.app import App
+        App.get_running_app().cart.subscribe(self.on_cart_changed)
+
     def _build_ui(self):
         # 主布局
         main_layout = MDBoxLayout(orientation='vertical')
@@ -233,6 +236,10 @@ class CheckoutScreen(Screen):
         """进入屏幕时更新数据"""
         self.update_order_info()
 
+    def on_cart_changed(self, event, product_id):
+        """购物车或优惠变化时更新金额"""
+        self.update_order_info()
+
     def update_order_info(self):
         """更新订单信息"""
         from kivy.app import App
@@ -248,24 +255,19 @@ class CheckoutScreen(Screen):
 
         if len(self.discount_input_label.text) > 0 and self.discount_input_label.text.isdigit():
             val = float(self.discount_input_label.text)
-            if val >= app.cart.subtotal * 0.3:
+            if to_cents(val) * 10 >= app.cart.subtotal_cents * 3:
                 MDSnackbar(
                     MDLabel(text=f"优惠不能低于3折", theme_text_color="Custom", text_color=(0.9, 0.2, 0.2, 1))
                 ).open()
                 return
             app.cart.set_coupon(val)
-            self.total_label.text = f"应付总额: ¥{app.cart.total:.1f}"
 
     def open_address_menu(self, *args):
         from kivy.app import App
         app = App.get_running_app()
 
         # 查找用户
-        user = None
-        for u in app.user_manager.users:
-            if u["phone"] == app.current_user['phone']:
-                user = u
-                break
+        user = app.user_manager.get_user(app.current_user['phone'])
 
         if not user:
             return
@@ -349,6 +351,11 @@ class CheckoutScreen(Screen):
 
         # 完成订单
         order = app.complete_order(order_data)
+        if order is None:
+            MDSnackbar(
+                MDLabel(text="订单提交失败，请重试", theme_text_color="Custom", text_color=(0.9, 0.2, 0.2, 1))
+            ).open()
+            return
 
         # 显示订单确认
         self.confirm_order_dialog = MDDialog(
@@ -386,7 +393,8 @@ class CheckoutScreen(Screen):
 
     def view_order(self, order):
         """ 调用 订单管理界面 的显示详情函数 """
-        OrdersScreen().show_order_detail(order, has_delete=False)  # 仅供查看，不包含删除按钮
+        from kivy.app import App
+        App.get_running_app().get_screen("orders").show_order_detail(order, has_delete=False)  # 仅供查看，不包含删除按钮
 
     def generate_order_id(self, length: int = 40) -> str:
         """
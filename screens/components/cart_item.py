@@ -10,6 +10,8 @@ from kivymd.uix.behaviors import HoverBehavior, TouchBehavior
 from kivy.uix.widget import Widget
 from kivy.metrics import dp, sp
 
+from .thumbnails import ThumbnailImage
+
 
 class CartItemWidget(MDBoxLayout):
     """购物车项组件"""
@@ -28,9 +30,9 @@ class CartItemWidget(MDBoxLayout):
         self.height = dp(100)
 
         # 商品图片
-        from kivy.uix.image import AsyncImage
-        image = AsyncImage(
-            source=self.image_url,
+        image = ThumbnailImage(
+            thumb_source=self.image_url,
+            thumb_size=128,
             size_hint=(None, 1),
             width=dp(35),
         )
@@ -54,7 +56,7 @@ class CartItemWidget(MDBoxLayout):
             height=dp(20)
         )
 
-        subtotal_label = MDLabel(
+        self.subtotal_label = MDLabel(
             text=f"小计: ¥{self.price * self.quantity:.1f}",
             theme_text_color="Secondary",
             font_style="Overline",
@@ -64,7 +66,7 @@ class CartItemWidget(MDBoxLayout):
 
         info_layout.add_widget(name_label)
         info_layout.add_widget(price_label)
-        info_layout.add_widget(subtotal_label)
+        info_layout.add_widget(self.subtotal_label)
 
         # 数量控制
         quantity_layout = MDBoxLayout(
@@ -115,36 +117,39 @@ class CartItemWidget(MDBoxLayout):
         self.add_widget(quantity_layout)
         self.add_widget(delete_btn)
 
+    def set_quantity(self, quantity):
+        """按购物车中的数量刷新显示（不会再回写购物车），数量未变化时不做任何更新"""
+        text = str(quantity)
+        if quantity == self.quantity and self.quantity_field.text == text:
+            return
+        self.quantity = quantity
+        self.subtotal_label.text = f"小计: ¥{self.price * self.quantity:.1f}"
+        self.quantity_field.text = text
+
     def decrease_quantity(self, *args):
         """减少数量"""
         if self.quantity > 1:
-            self.quantity -= 1
-            self.quantity_field.text = str(self.quantity)
-            self.update_cart()
+            self.update_cart(self.quantity - 1)
 
     def increase_quantity(self, *args):
         """增加数量"""
-        self.quantity += 1
-        self.quantity_field.text = str(self.quantity)
-        self.update_cart()
+        self.update_cart(self.quantity + 1)
 
     def on_quantity_changed(self, instance, value):
         """数量输入变化"""
         try:
-            self.quantity = int(value) if value else 1
-            self.update_cart()
+            quantity = int(value) if value else 1
         except ValueError:
-            pass
+            return
+        # 由 set_quantity 引起的文本变化不再重复更新购物车
+        if quantity != self.quantity:
+            self.update_cart(quantity)
 
-    def update_cart(self):
-        """更新购物车"""
+    def update_cart(self, quantity=None):
+        """更新购物车，界面上的数量由购物车界面根据结果回填"""
         from kivy.app import App
         app = App.get_running_app()
-        app.update_cart_item(self.product_id, self.quantity)
-
-        # 更新商品界面 购物车徽章
-        product_screen = app.screen_manager.get_screen("products")
-        product_screen.update_badge_color_text(app.cart.item_count)
+        app.update_cart_item(self.product_id, self.quantity if quantity is None else quantity)
 
     def remove_item(self, *args):
         """移除商品"""
@@ -0,0 +1,208 @@
+"""订单流式导出
+
+按页从 OrderManager 查询订单，逐行生成并写入文件，内存占用只与一页订单数相关，与导出的订单总数无关。
+支持的格式：
+    items  CSV，每个订单商品一行（订单字段重复出现在每一行中）
+    orders CSV，每个订单一行，只包含标量列（商品数量、商品ID列表等汇总列代替嵌套的 items）
+    jsonl  每个订单一行 JSON
+导出先写入临时文件，完成后再替换为目标文件；可在后台线程中运行，进度和结果回调在主线程中调用。
+"""
+import csv
+import json
+import os
+import threading
+from datetime import datetime
+
+from kivy.clock import Clock
+from kivy.logger import Logger
+
+from .storage import DATA_DIR
+from .money import to_cents, from_cents
+
+EXPORT_DIR = DATA_DIR + "/exports"
+
+ORDER_FIELDS = ["order_id", "user_name", "user_phone", "address", "payment_method", "status",
+                "created_at", "updated_at"]
+ITEM_FIELDS = ["product_id", "product_name", "price", "quantity", "subtotal", "specifications"]
+ORDER_AMOUNT_FIELDS = ["subtotal", "discount", "total"]
+
+FORMATS = {
+    "items": (".csv", ORDER_FIELDS + ["order_" + name for name in ORDER_AMOUNT_FIELDS] + ITEM_FIELDS),
+    "orders": (".csv", ORDER_FIELDS + ORDER_AMOUNT_FIELDS + ["item_count", "quantity", "product_ids"]),
+    "jsonl": (".jsonl", None),
+}
+
+
+class _LineBuffer:
+    """csv.writer 的输出目标，保存刚写入的一行"""
+
+    def __init__(self):
+        self.line = ""
+
+    def write(self, text):
+        self.line = text
+
+
+def iter_item_rows(order):
+    """订单的每个商品一行"""
+    base = [getattr(order, name) for name in ORDER_FIELDS]
+    base += [from_cents(order.subtotal_cents), from_cents(order.discount_cents), from_cents(order.total_cents)]
+    for item in order.items:
+        price = item.get('price', 0)
+        quantity = item.get('quantity', 0)
+        yield base + [
+            item.get('product_id', ""),
+            item.get('product_name', ""),
+            price,
+            quantity,
+            from_cents(to_cents(price) * quantity),
+            json.dumps(item.get('specifications') or {}, ensure_ascii=False),
+        ]
+
+
+def iter_order_rows(order):
+    """订单一行（嵌套的商品列表汇总为标量列）"""
+    row = [getattr(order, name) for name in ORDER_FIELDS]
+    row += [from_cents(order.subtotal_cents), from_cents(order.discount_cents), from_cents(order.total_cents)]
+    row += [
+        len(order.items),
+        sum(item.get('quantity', 0) for item in order.items),
+        ";".join(str(item.get('product_id', "")) for item in order.items),
+    ]
+    yield row
+
+
+def iter_lines(orders, fmt: str = "items"):
+    """逐行生成导出内容（包含换行符）；orders 可以是任意可迭代对象"""
+    if fmt not in FORMATS:
+        raise ValueError(f"不支持的导出格式: {fmt}")
+
+    if fmt == "jsonl":
+        for order in orders:
+            yield json.dumps(order.to_dict(), ensure_ascii=False) + "\n"
+        return
+
+    buffer = _LineBuffer()
+    writer = csv.writer(buffer)
+    writer.writerow(FORMATS[fmt][1])
+    yield buffer.line
+    rows = iter_item_rows if fmt == "items" else iter_order_rows
+    for order in orders:
+        for row in rows(order):
+            writer.writerow(row)
+            yield buffer.line
+
+
+def write_orders(f, orders, fmt: str = "items") -> int:
+    """将订单逐行写入已打开的文本文件，返回写入的订单数"""
+    count = 0
+
+    def counted():
+        nonlocal count
+        for order in orders:
+            count += 1
+            yield order
+
+    for line in iter_lines(counted(), fmt):
+        f.write(line)
+    return count
+
+
+class OrderExporter:
+    """从 OrderManager 分页读取订单并流式导出"""
+
+    def __init__(self, order_manager, page_size: int = 200):
+        self.order_manager = order_manager
+        self.page_size = page_size
+
+    def iter_orders(self, start=None, end=None, cancelled: threading.Event = None):
+        """按页产生下单时间在范围内的订单（最新的在前），每页重新定位游标，导出期间订单增删不影响遍历"""
+        query = self.order_manager.query_orders(start=start, end=end)
+        cursor = None
+        while True:
+            if cancelled is not None and cancelled.is_set():
+                return
+            page, cursor = query.page(cursor, self.page_size)
+            yield from page
+            if cursor is None:
+                return
+
+    @staticmethod
+    def default_path(fmt: str = "items", directory: str = EXPORT_DIR) -> str:
+        return os.path.join(directory, f"orders_{datetime.now().strftime('%Y%m%d_%H%M%S')}{FORMATS[fmt][0]}")
+
+    def export(self, path: str = None, fmt: str = "items", start=None, end=None,
+               progress=None, cancelled: threading.Event = None) -> str:
+        """
+        导出订单到文件
+
+        Args:
+            path: 目标文件路径，默认 data/exports/orders_<时间>.<扩展名>
+            fmt: 导出格式（items / orders / jsonl）
+            start, end: 下单时间范围（含两端），同 OrderManager.query_orders
+            progress: progress(已导出订单数, 订单总数)，每页调用一次
+            cancelled: 设置后停止导出，不生成目标文件
+
+        Returns:
+            导出的文件路径；取消时返回 None
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"不支持的导出格式: {fmt}")
+        path = path or self.default_path(fmt)
+        total = self.order_manager.query_orders(start=start, end=end).count() if progress else 0
+        done = 0
+
+        def tracked():
+            nonlocal done
+            for order in self.iter_orders(start, end, cancelled):
+                yield order
+                done += 1
+                if progress and done % self.page_size == 0:
+                    progress(done, total)
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + ".tmp"
+        try:
+            # utf-8-sig：带 BOM，Excel 打开中文不乱码
+            with open(tmp_path, 'w', newline='', encoding='utf-8-sig' if fmt != "jsonl" else 'utf-8') as f:
+                write_orders(f, tracked(), fmt)
+            if cancelled is not None and cancelled.is_set():
+                os.remove(tmp_path)
+                return None
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if progress:
+            progress(done, total)
+        return path
+
+    def export_async(self, path: str = None, fmt: str = "items", start=None, end=None,
+                     progress=None, on_done=None, on_error=None) -> threading.Event:
+        """
+        在后台线程中导出，progress(已导出, 总数)、on_done(路径或 None)、on_error(异常) 在主线程中调用
+
+        Returns:
+            取消标志，set() 后停止导出
+        """
+        cancelled = threading.Event()
+
+        def main_thread(callback, *args):
+            if callback is not None:
+                Clock.schedule_once(lambda dt: callback(*args))
+
+        def run():
+            try:
+                result = self.export(path, fmt, start, end,
+                                     progress=(lambda done, total: main_thread(progress, done, total))
+                                     if progress else None,
+                                     cancelled=cancelled)
+            except Exception as e:
+                Logger.warning(f"导出订单失败: {e}")
+                main_thread(on_error, e)
+                return
+            main_thread(on_done, result)
+
+        threading.Thread(target=run, name="order-export", daemon=True).start()
+        return cancelled
@@ -1,11 +1,14 @@
+import bisect
+import heapq
 import json
 import os
 import uuid
 
 from datetime import datetime
 from enum import Enum
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass, field, asdict
+from functools import cached_property
 from kivy.logger import Logger
 
 import sys
@@ -13,6 +16,9 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__)))
 
+from .storage import Storage, JsonStorage
+from .money import to_cents, from_cents
+
 
 class ProductCategory(Enum):
     ELECTRONICS = "电子产品"
@@ -46,8 +52,19 @@ class Product:
     is_featured: bool = False
     created_at: str = field(default_factory=lambda: datetime.now().isoformat())
 
+    @property
+    def price_cents(self) -> int:
+        # 缓存换算结果（Decimal 换算较慢），价格被修改后重新计算
+        cached = self.__dict__.get('_price_cents')
+        if cached is None or cached[0] != self.price:
+            cached = self.__dict__['_price_cents'] = (self.price, to_cents(self.price))
+        return cached[1]
+
     def to_dict(self):
-        data = asdict(self)
+        # 只复制一层（asdict 会递归深复制每个嵌套的字典和列表，保存大量商品时很慢）
+        data = {name: getattr(self, name) for name in self.__dataclass_fields__}
+        data['images'] = list(self.images)
+        data['specifications'] = dict(self.specifications)
         data['category'] = self.category.value if isinstance(self.category, ProductCategory) else str(self.category)
         return data
 
@@ -67,45 +84,86 @@ class CartItem:
     image: str = ""
     specifications: Dict = field(default_factory=dict)
 
+    @cached_property
+    def price_cents(self) -> int:
+        return to_cents(self.price)
+
+    @property
+    def subtotal_cents(self) -> int:
+        return self.price_cents * self.quantity
+
     @property
     def subtotal(self):
-        return self.price * self.quantity
+        return from_cents(self.subtotal_cents)
 
 
 class ShoppingCart:
-    """购物车"""
+    """购物车（以分为单位维护商品数量和金额的累计值，变化时通知订阅者）"""
 
     def __init__(self):
         self.items: Dict[str, CartItem] = {}
         self.coupon: Optional[Dict] = None
+        self._item_count = 0
+        self._subtotal_cents = 0
+        self._listeners = []
+
+    def subscribe(self, callback):
+        """订阅购物车变化，callback(event, product_id)，event 为 add/update/remove/clear/coupon"""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, event: str, product_id: Optional[str] = None):
+        for callback in list(self._listeners):
+            callback(event, product_id)
+
+    def _change_quantity(self, item: CartItem, delta: int):
+        item.quantity += delta
+        self._item_count += delta
+        self._subtotal_cents += item.price_cents * delta
 
     def add_item(self, product: Product, quantity: int = 1, specifications=None):
         if product.id in self.items:
-            self.items[product.id].quantity += quantity
+            self._change_quantity(self.items[product.id], quantity)
+            self._notify('update', product.id)
         else:
-            self.items[product.id] = CartItem(
+            item = CartItem(
                 product_id=product.id,
                 product_name=product.name,
                 price=product.price,
-                quantity=quantity,
+                quantity=0,
                 image=product.images[0] if product.images else "",
                 specifications=specifications or {}
             )
+            self.items[product.id] = item
+            self._change_quantity(item, quantity)
+            self._notify('add', product.id)
 
     def remove_item(self, product_id: str):
         if product_id in self.items:
-            del self.items[product_id]
+            item = self.items.pop(product_id)
+            self._change_quantity(item, -item.quantity)
+            self._notify('remove', product_id)
 
     def update_quantity(self, product_id: str, quantity: int):
         if product_id in self.items:
             if quantity <= 0:
                 self.remove_item(product_id)
             else:
-                self.items[product_id].quantity = quantity
+                item = self.items[product_id]
+                if quantity != item.quantity:
+                    self._change_quantity(item, quantity - item.quantity)
+                    self._notify('update', product_id)
 
     def clear(self):
         self.items.clear()
         self.coupon = None
+        self._item_count = 0
+        self._subtotal_cents = 0
+        self._notify('clear')
 
     def set_coupon(self, val):
         if self.coupon is None:
@@ -114,26 +172,39 @@ class ShoppingCart:
             self.coupon["value"] = val
         else:
             self.coupon = {"value": val}
+        self._notify('coupon')
 
     @property
     def item_count(self):
-        return sum(item.quantity for item in self.items.values())
+        return self._item_count
 
     @property
-    def subtotal(self):
-        return sum(item.subtotal for item in self.items.values())
+    def subtotal_cents(self) -> int:
+        return self._subtotal_cents
 
     @property
-    def discount(self):
+    def discount_cents(self) -> int:
         if self.coupon:
             # 简化折扣计算, 最低5折
             # return min(self.coupon.get('value', 0), self.subtotal * 0.5)
-            return self.coupon.get('value', 0)
+            return to_cents(self.coupon.get('value', 0))
         return 0
 
+    @property
+    def total_cents(self) -> int:
+        return self.subtotal_cents - self.discount_cents
+
+    @property
+    def subtotal(self):
+        return from_cents(self.subtotal_cents)
+
+    @property
+    def discount(self):
+        return from_cents(self.discount_cents)
+
     @property
     def total(self):
-        return self.subtotal - self.discount
+        return from_cents(self.total_cents)
 
     def to_dict(self):
         return {
@@ -161,8 +232,23 @@ class Order:
     created_at: str
     updated_at: str = ""
 
+    # 金额字段以元保存（兼容已有的数据文件），计算汇总时使用以下整数分（订单金额不再修改，换算一次后缓存）
+    @cached_property
+    def subtotal_cents(self) -> int:
+        return to_cents(self.subtotal)
+
+    @cached_property
+    def discount_cents(self) -> int:
+        return to_cents(self.discount)
+
+    @cached_property
+    def total_cents(self) -> int:
+        return to_cents(self.total)
+
     def to_dict(self):
-        data = asdict(self)
+        # 订单明细下单后不再修改，只复制列表本身（避免 asdict 递归深复制）
+        data = {name: getattr(self, name) for name in self.__dataclass_fields__}
+        data['items'] = list(self.items)
         return data
 
     @classmethod
@@ -189,29 +275,208 @@ class Category:
 
 
 class OrderManager:
-    """订单管理器"""
+    """订单管理器
+
+    订单按下单顺序保存在以订单号为键的字典中，并维护以下二级索引：
+    用户手机号、(年, 月)（月份键保持有序）、状态、商品ID -> 订单列表，
+    有序的订单号列表（前缀查询），以及收货地址和商品名称的 n-gram 倒排索引（文本查询，首次按文字查询时才建立）。
+    每个订单加入时分配递增的序号，各列表都按序号有序，分页查询以序号作为游标。
+    同时按月维护订单数、金额、优惠（整数分）和各状态订单数的汇总，随订单一起持久化。
+    """
 
-    def __init__(self, data_file: str = "/data/orders.json"):
+    def __init__(self, data_file: str = "/data/orders.json", storage: Optional[Storage] = None):
         self.orders_file = str(Path(__file__).parent.parent.parent) + data_file
-        self.orders = self.load_orders()
+        self.storage = storage or JsonStorage({'orders': self.orders_file})
+        self._by_id: Dict[str, Order] = {}
+        self._all: List[Order] = []  # 按序号排列的全部订单
+        self._seq: Dict[str, int] = {}  # 订单号 -> 序号
+        self._next_seq = 0
+        self._by_user: Dict[str, List[Order]] = {}
+        self._by_month: Dict[Tuple[int, int], List[Order]] = {}
+        self._months: List[Tuple[int, int]] = []  # 有序的 (年, 月) 列表
+        self._by_status: Dict[str, List[Order]] = {}
+        self._by_product: Dict[str, List[Order]] = {}
+        self._order_ids: List[str] = []  # 有序的订单号（前缀查询，订单号为小写十六进制）
+        self._text_index: Optional["SearchIndex"] = None  # 收货地址 + 商品名称，首次文本查询时建立
+        self._month_stats: Dict[Tuple[int, int], Dict] = {}  # (年, 月) -> 汇总
+        self._summary = self._empty_stats()  # 全部订单的汇总
+        for order in self.load_orders():
+            self._index_order(order, bulk=True)
+        self._order_ids.sort()
+        self.load_stats()
+
+    @property
+    def orders(self) -> List[Order]:
+        """按下单顺序排列的全部订单"""
+        return list(self._by_id.values())
+
+    @staticmethod
+    def month_key(order: Order) -> Tuple[int, int]:
+        """订单所属的 (年, 月)"""
+        try:
+            return int(order.created_at[:4]), int(order.created_at[5:7])
+        except ValueError:
+            created = datetime.fromisoformat(order.created_at)
+            return created.year, created.month
+
+    def _index_order(self, order: Order, bulk: bool = False):
+        """将订单加入各索引（bulk 为 True 时不保持订单号列表有序，由调用方加载完后统一排序）"""
+        self._by_id[order.order_id] = order
+        self._next_seq += 1
+        self._seq[order.order_id] = self._next_seq
+        self._all.append(order)
+        self._by_user.setdefault(order.user_phone, []).append(order)
+        key = self.month_key(order)
+        if key not in self._by_month:
+            self._by_month[key] = []
+            bisect.insort(self._months, key)
+        self._by_month[key].append(order)
+        self._by_status.setdefault(order.status, []).append(order)
+        for product_id in self._product_ids(order):
+            self._by_product.setdefault(product_id, []).append(order)
+        if bulk:
+            self._order_ids.append(order.order_id)
+        else:
+            bisect.insort(self._order_ids, order.order_id)
+        if self._text_index is not None:
+            self._add_text(order)
+
+    def _add_text(self, order: Order):
+        self._text_index.add_document(
+            order.order_id, str(order.address), " ".join(str(item.get('product_name', "")) for item in order.items))
+
+    def _get_text_index(self) -> "SearchIndex":
+        """文本索引（首次使用时为全部订单建立，之后随订单增删更新）"""
+        if self._text_index is None:
+            self._text_index = SearchIndex()
+            for order in self._all:
+                self._add_text(order)
+        return self._text_index
+
+    @staticmethod
+    def _product_ids(order: Order) -> set:
+        return {item.get('product_id') for item in order.items if item.get('product_id')}
+
+    def _remove_sorted(self, orders: List[Order], order: Order):
+        """从按序号有序的订单列表中移除订单（二分查找位置，需在删除序号之前调用）"""
+        i = bisect.bisect_left(orders, self._seq[order.order_id], key=lambda o: self._seq[o.order_id])
+        if i < len(orders) and orders[i] is order:
+            del orders[i]
+
+    def _remove_from(self, index: Dict, key, order: Order):
+        orders = index[key]
+        self._remove_sorted(orders, order)
+        if not orders:
+            del index[key]
+
+    def _unindex_order(self, order: Order):
+        """将订单从各索引中移除"""
+        del self._by_id[order.order_id]
+        self._remove_sorted(self._all, order)
+        self._remove_from(self._by_user, order.user_phone, order)
+        self._remove_from(self._by_status, order.status, order)
+        for product_id in self._product_ids(order):
+            self._remove_from(self._by_product, product_id, order)
+        del self._order_ids[bisect.bisect_left(self._order_ids, order.order_id)]
+        if self._text_index is not None:
+            self._text_index.remove(order.order_id)
+        key = self.month_key(order)
+        self._remove_from(self._by_month, key, order)
+        if key not in self._by_month:
+            self._months.remove(key)
+        del self._seq[order.order_id]
+
+    @staticmethod
+    def _empty_stats(key: Optional[Tuple[int, int]] = None) -> Dict:
+        return {
+            'month': f"{key[0]:04d}-{key[1]:02d}" if key else "",
+            'count': 0,
+            'revenue_cents': 0,
+            'discount_cents': 0,
+            'status': {},
+        }
+
+    def _apply_stats(self, order: Order, sign: int):
+        """将订单计入（sign=1）或移出（sign=-1）汇总，返回所属的 (年, 月)"""
+        key = self.month_key(order)
+        if key not in self._month_stats:
+            self._month_stats[key] = self._empty_stats(key)
+        for stats in (self._month_stats[key], self._summary):
+            stats['count'] += sign
+            stats['revenue_cents'] += sign * order.total_cents
+            stats['discount_cents'] += sign * order.discount_cents
+            status = stats['status']
+            status[order.status] = status.get(order.status, 0) + sign
+            if not status[order.status]:
+                del status[order.status]
+        if not self._month_stats[key]['count']:
+            del self._month_stats[key]
+        return key
+
+    def load_stats(self):
+        """加载持久化的月度汇总；与订单数不一致或是旧格式（浮点金额）时从订单重新计算"""
+        try:
+            rows = self.storage.load('order_stats')
+        except Exception:
+            rows = []
+
+        if (sum(row['count'] for row in rows) == len(self._by_id)
+                and all('revenue_cents' in row for row in rows)):
+            for row in rows:
+                key = (int(row['month'][:4]), int(row['month'][5:7]))
+                self._month_stats[key] = row
+                self._summary['count'] += row['count']
+                self._summary['revenue_cents'] += row['revenue_cents']
+                self._summary['discount_cents'] += row['discount_cents']
+                for status, count in row['status'].items():
+                    self._summary['status'][status] = self._summary['status'].get(status, 0) + count
+            return
+
+        self._month_stats.clear()
+        self._summary = self._empty_stats()
+        for order in self._by_id.values():
+            self._apply_stats(order, 1)
+        self.save_stats()
+
+    def save_stats(self):
+        """保存全部月度汇总"""
+        try:
+            self.storage.save('order_stats', [self._month_stats[key] for key in sorted(self._month_stats)])
+        except Exception as e:
+            Logger.warning(f"保存订单统计失败: {e}")
+
+    def _save_month_stats(self, key: Tuple[int, int]):
+        """保存某个月的汇总（后端不支持单行写入时整表保存）"""
+        if not self.storage.supports_row_writes('order_stats'):
+            return self.save_stats()
+        try:
+            if key in self._month_stats:
+                stats = self._month_stats[key]
+                self.storage.upsert('order_stats', [dict(stats, status=dict(stats['status']))])
+            else:
+                self.storage.delete('order_stats', [self._empty_stats(key)['month']])
+        except Exception as e:
+            Logger.warning(f"保存订单统计失败: {e}")
+
+    def _insert_order(self, order: Order):
+        self._index_order(order)
+        return self._apply_stats(order, 1)
+
+    def _remove_order(self, order: Order):
+        self._unindex_order(order)
+        return self._apply_stats(order, -1)
 
     def load_orders(self):
-        """从文件加载订单"""
-        if os.path.exists(self.orders_file):
-            try:
-                with open(self.orders_file, 'r', encoding='utf-8') as f:
-                    orders_data = json.load(f)
-                    return [Order.from_dict(order) for order in orders_data]
-            except:
-                return []
-        return []
+        """加载订单"""
+        try:
+            return [Order.from_dict(order) for order in self.storage.load('orders')]
+        except:
+            return []
 
     def save_orders(self):
-        """保存订单到文件"""
+        """保存全部订单"""
         try:
-            with open(self.orders_file, 'w', encoding='utf-8') as f:
-                orders_data = [order.to_dict() for order in self.orders]
-                json.dump(orders_data, f, ensure_ascii=False, indent=2)
+            self.storage.save('orders', [order.to_dict() for order in self._by_id.values()])
             return True
         except Exception as e:
             Logger.warning(f"保存订单失败: {e}")
@@ -219,23 +484,189 @@ class OrderManager:
 
     def add_order(self, order: Order):
         """添加订单"""
-        self.orders.append(order)
-        self.save_orders()
+        key = self._insert_order(order)
+        self.storage.on_rollback(lambda: self._remove_order(order))
+        self._save_month_stats(key)
+        if not self.storage.supports_row_writes('orders'):
+            return self.save_orders()
+        try:
+            self.storage.upsert('orders', [order.to_dict()])
+            return True
+        except Exception as e:
+            Logger.warning(f"保存订单失败: {e}")
+            return False
 
     def delete_order(self, order: Order):
-        if order in self.orders:
-            self.orders.remove(order)
+        order = self._by_id.get(order.order_id)
+        if order is None:
+            return
+        key = self._remove_order(order)
+        self.storage.on_rollback(lambda: self._insert_order(order))
+        self._save_month_stats(key)
+        if not self.storage.supports_row_writes('orders'):
             self.save_orders()
+            return
+        try:
+            self.storage.delete('orders', [order.order_id])
+        except Exception as e:
+            Logger.warning(f"删除订单失败: {e}")
         return
 
+    def get_order(self, order_id: str) -> Optional[Order]:
+        """根据订单号获取订单"""
+        return self._by_id.get(order_id)
+
     def get_orders_by_user(self, user_phone: str):
         """获取用户的订单"""
-        return [order for order in self.orders if order.user_phone == user_phone]
+        return list(self._by_user.get(user_phone, []))
+
+    def get_orders_by_month(self, year: int, month: int) -> List[Order]:
+        """获取某年某月的订单"""
+        return list(self._by_month.get((year, month), []))
+
+    def get_months(self, year: Optional[int] = None) -> List[Tuple[int, int]]:
+        """获取有订单的 (年, 月) 列表（升序），可按年份筛选"""
+        if year is None:
+            return list(self._months)
+        start = bisect.bisect_left(self._months, (year, 0))
+        end = bisect.bisect_left(self._months, (year + 1, 0))
+        return self._months[start:end]
 
     def get_all_orders(self):
         """获取所有订单"""
         return self.orders
 
+    def paginate(self, orders: List[Order], cursor: Optional[int] = None,
+                 limit: int = 50) -> Tuple[List[Order], Optional[int]]:
+        """对按序号有序的订单列表分页（最新的在前）
+
+        cursor 为上一页返回的游标，None 表示第一页；返回 (本页订单, 下一页游标)，没有更多时游标为 None。
+        """
+        end = len(orders) if cursor is None else bisect.bisect_left(
+            orders, cursor, key=lambda order: self._seq[order.order_id])
+        start = max(0, end - limit)
+        page = orders[start:end][::-1]
+        next_cursor = self._seq[page[-1].order_id] if page and start > 0 else None
+        return page, next_cursor
+
+    def get_orders_page(self, cursor: Optional[int] = None, limit: int = 50,
+                        user_phone: Optional[str] = None,
+                        month: Optional[Tuple[int, int]] = None) -> Tuple[List[Order], Optional[int]]:
+        """分页获取订单（最新的在前），可限定用户或 (年, 月)"""
+        if user_phone is not None:
+            orders = self._by_user.get(user_phone, [])
+        elif month is not None:
+            orders = self._by_month.get(month, [])
+        else:
+            orders = self._all
+        return self.paginate(orders, cursor, limit)
+
+    @staticmethod
+    def _time_key(value) -> str:
+        """统一时间格式为 "YYYY-MM-DD HH:MM:SS"（可只有日期部分），用于字符串比较"""
+        return str(value)[:19].replace("T", " ")
+
+    def _match_text(self, text: str) -> set:
+        """订单号前缀匹配，或收货地址、商品名称包含查询串的订单号集合"""
+        ids = set(self._get_text_index().match(text))
+        start = bisect.bisect_left(self._order_ids, text)
+        for order_id in self._order_ids[start:]:
+            if not order_id.startswith(text):
+                break
+            ids.add(order_id)
+        return ids
+
+    def query_orders(self, status: Optional[str] = None, start=None, end=None,
+                     min_total: Optional[float] = None, max_total: Optional[float] = None,
+                     product_id: Optional[str] = None, text: Optional[str] = None,
+                     user_phone: Optional[str] = None) -> "OrderQuery":
+        """
+        按条件查询订单（各条件同时满足）
+
+        Args:
+            status: 订单状态
+            start, end: 下单时间范围（含两端），可为日期/时间对象或字符串，只给日期时包含当天全部订单
+            min_total, max_total: 实付金额范围（元，含两端）
+            product_id: 包含该商品的订单
+            text: 订单号前缀，或收货地址、商品名称中包含的文字
+            user_phone: 下单用户
+
+        Returns:
+            OrderQuery：惰性求值的查询结果，按页获取（最新的在前）
+        """
+        # 每个有索引的条件对应一个按序号有序的候选列表 (列表, 是否为快照)，从最短的列表开始逐个检查其余条件；
+        # 索引中的列表随订单增删实时更新，快照（多个月份归并、文本命中）则需要同时保存各订单的序号
+        candidates = []
+        predicates = []
+
+        if user_phone is not None:
+            candidates.append((self._by_user.get(user_phone, []), False))
+            predicates.append(lambda o: o.user_phone == user_phone)
+        if status is not None:
+            candidates.append((self._by_status.get(status, []), False))
+            predicates.append(lambda o: o.status == status)
+        if product_id is not None:
+            candidates.append((self._by_product.get(product_id, []), False))
+            predicates.append(lambda o: product_id in self._product_ids(o))
+
+        if start is not None or end is not None:
+            start_key = self._time_key(start) if start is not None else ""
+            end_key = self._time_key(end) if end is not None else ""
+            months = self._months
+            if start_key:
+                months = months[bisect.bisect_left(months, (int(start_key[:4]), int(start_key[5:7]))):]
+            if end_key:
+                months = months[:bisect.bisect_right(months, (int(end_key[:4]), int(end_key[5:7])))]
+            if len(months) == 1:
+                candidates.append((self._by_month[months[0]], False))
+            elif len(months) < len(self._months):
+                # 多个月份的列表按序号归并
+                merged = list(heapq.merge(*(self._by_month[key] for key in months),
+                                          key=lambda o: self._seq[o.order_id]))
+                candidates.append((merged, True))
+            predicates.append(lambda o: (
+                start_key <= self._time_key(o.created_at)
+                and (not end_key or self._time_key(o.created_at) <= end_key
+                     or self._time_key(o.created_at).startswith(end_key))))
+
+        if min_total is not None or max_total is not None:
+            low = to_cents(min_total) if min_total is not None else None
+            high = to_cents(max_total) if max_total is not None else None
+            predicates.append(lambda o: (low is None or o.total_cents >= low)
+                              and (high is None or o.total_cents <= high))
+
+        text = (text or "").strip().lower()
+        if text:
+            ids = self._match_text(text)
+            candidates.append((sorted((self._by_id[order_id] for order_id in ids if order_id in self._by_id),
+                                      key=lambda o: self._seq[o.order_id]), True))
+            predicates.append(lambda o: o.order_id in ids)
+
+        orders, snapshot = min(candidates, key=lambda c: len(c[0])) if candidates else (self._all, False)
+        seq = {order.order_id: self._seq[order.order_id] for order in orders} if snapshot else None
+        return OrderQuery(self, orders, predicates, seq)
+
+    def get_recent_orders(self, limit: int = 5) -> List[Order]:
+        """获取最近的若干订单（按下单时间倒序）"""
+        recent = []
+        for key in reversed(self._months):
+            recent.extend(sorted(self._by_month[key], key=lambda o: o.created_at, reverse=True))
+            if len(recent) >= limit:
+                break
+        return recent[:limit]
+
+    def get_summary(self) -> Dict:
+        """全部订单的汇总：订单数、金额和优惠（分）、各状态订单数"""
+        return self._summary
+
+    def get_month_stats(self, year: int, month: int) -> Dict:
+        """某年某月的汇总"""
+        return self._month_stats.get((year, month)) or self._empty_stats((year, month))
+
+    def get_year_stats(self, year: int) -> Dict[int, Dict]:
+        """某年各月的汇总：月份 -> 汇总（仅包含有订单的月份）"""
+        return {month: self._month_stats[(y, month)] for y, month in self.get_months(year)}
+
     # def update_order_status(self, order_id: str, status: str):
     #     """更新订单状态"""
     #     for order in self.orders:
@@ -247,39 +678,174 @@ class OrderManager:
     #     return False
 
 
+class OrderQuery:
+    """订单查询结果（惰性求值）
+
+    创建时只确定候选订单列表（按序号有序）和过滤条件，获取某一页时才从游标处向前逐个检查，
+    取满一页即停止，开销与翻过的候选订单数相关，而与订单总数无关。
+    """
+
+    def __init__(self, manager: OrderManager, orders: List[Order], predicates, seq: Optional[Dict[str, int]] = None):
+        self._manager = manager
+        self._orders = orders
+        self._predicates = predicates
+        self._seq = seq if seq is not None else manager._seq
+
+    def _matches(self, order: Order) -> bool:
+        # 快照中的订单可能已被删除
+        return (self._manager._by_id.get(order.order_id) is order
+                and all(predicate(order) for predicate in self._predicates))
+
+    def _iter_from(self, cursor: Optional[int] = None):
+        orders = self._orders
+        end = len(orders) if cursor is None else bisect.bisect_left(
+            orders, cursor, key=lambda order: self._seq[order.order_id])
+        for i in range(end - 1, -1, -1):
+            if self._matches(orders[i]):
+                yield orders[i]
+
+    def __iter__(self):
+        """依次产生全部符合条件的订单（最新的在前）"""
+        return self._iter_from()
+
+    def page(self, cursor: Optional[int] = None, limit: int = 50) -> Tuple[List[Order], Optional[int]]:
+        """获取一页（与 OrderManager.paginate 的游标含义相同），没有更多时游标为 None"""
+        page = []
+        for order in self._iter_from(cursor):
+            if len(page) == limit:
+                return page, self._seq[page[-1].order_id]
+            page.append(order)
+        return page, None
+
+    def first(self) -> Optional[Order]:
+        """最新的一个符合条件的订单"""
+        return next(iter(self), None)
+
+    def count(self) -> int:
+        """符合条件的订单数（需要检查全部候选订单）"""
+        return sum(1 for _ in self)
+
+
+class SearchIndex:
+    """文本搜索索引（商品、订单共用）
+
+    对文档的名称和描述（商品名称和描述，或订单收货地址和商品名称）建立字符 n-gram（单字 + 双字）倒排索引，适用于不分词的中文。
+    查询时取查询串各 n-gram 倒排表的交集作为候选，再对候选做子串校验并按相关度排序，
+    查询开销与命中数量相关，而与商品总数无关。
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, set] = {}  # n-gram -> 商品ID集合
+        self._docs: Dict[str, Tuple[str, str]] = {}  # 商品ID -> (小写名称, 小写描述)
+        self._order: Dict[str, int] = {}  # 商品ID -> 加入顺序（相关度相同时保持原顺序）
+        self._counter = 0
+
+    @staticmethod
+    def tokenize(text: str) -> set:
+        """将文本切分为单字和双字 n-gram"""
+        text = text.lower()
+        grams = set(text)
+        grams.update(text[i:i + 2] for i in range(len(text) - 1))
+        return grams
+
+    def add(self, product: Product):
+        """加入或更新商品"""
+        self.add_document(product.id, str(product.name), str(product.description))
+
+    def add_document(self, doc_id: str, name: str, description: str = ""):
+        """加入或更新文档"""
+        if doc_id in self._docs:
+            self.remove(doc_id)
+        else:
+            self._order[doc_id] = self._counter
+            self._counter += 1
+        name, description = name.lower(), description.lower()
+        self._docs[doc_id] = (name, description)
+        for gram in self.tokenize(name) | self.tokenize(description):
+            self._postings.setdefault(gram, set()).add(doc_id)
+
+    def remove(self, doc_id: str):
+        """移除文档"""
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+        for gram in self.tokenize(doc[0]) | self.tokenize(doc[1]):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(doc_id)
+                if not ids:
+                    del self._postings[gram]
+
+    def _candidates(self, query: str) -> set:
+        grams = [query] if len(query) == 1 else [query[i:i + 2] for i in range(len(query) - 1)]
+        postings = sorted((self._postings.get(gram, set()) for gram in set(grams)), key=len)
+        return set(postings[0]).intersection(*postings[1:])
+
+    def match(self, query: str) -> List[str]:
+        """名称或描述包含查询串的文档ID（不排序）"""
+        query = query.strip().lower()
+        if not query:
+            return []
+        return [doc_id for doc_id in self._candidates(query)
+                if query in self._docs[doc_id][0] or query in self._docs[doc_id][1]]
+
+    def search(self, query: str) -> List[str]:
+        """
+        搜索名称或描述包含查询串的商品
+
+        Returns:
+            按相关度排序的商品ID列表：名称以查询串开头 > 名称包含 > 仅描述包含
+        """
+        query = query.strip().lower()
+        if not query:
+            return []
+
+        scored = []
+        for product_id in self._candidates(query):
+            name, description = self._docs[product_id]
+            score = 0
+            if name.startswith(query):
+                score += 4
+            if query in name:
+                score += 2
+            if query in description:
+                score += 1
+            if score:
+                scored.append((-score, self._order[product_id], product_id))
+        scored.sort()
+        return [product_id for _, _, product_id in scored]
+
+
 class InventoryManager:
     """库存管理器"""
 
-    def __init__(self, db, data_file: str = "/data/categories.json"):
+    def __init__(self, db, data_file: str = "/data/categories.json", storage: Optional[Storage] = None):
         self.db = db
         self.categories_file = str(Path(__file__).parent.parent.parent) + data_file
+        self.storage = storage or JsonStorage({'categories': self.categories_file})
         self.categories = self.load_categories()
 
     def load_categories(self):
         """加载分类"""
-        if os.path.exists(self.categories_file):
-            try:
-                with open(self.categories_file, 'r', encoding='utf-8') as f:
-                    categories_data = json.load(f)
-                    return [Category.from_dict(cat) for cat in categories_data]
-            except:
-                # 默认分类
-                return [
-                    Category("electronics", "电子产品", "laptop"),
-                    Category("clothing", "服装服饰", "tshirt-crew"),
-                    Category("food", "食品饮料", "food"),
-                    Category("books", "图书音像", "book"),
-                    Category("home", "家居用品", "home"),
-                    Category("beauty", "美妆个护", "face-woman")
-                ]
-        return []
+        try:
+            return [Category.from_dict(cat) for cat in self.storage.load('categories')]
+        except FileNotFoundError:
+            return []
+        except:
+            # 默认分类
+            return [
+                Category("electronics", "电子产品", "laptop"),
+                Category("clothing", "服装服饰", "tshirt-crew"),
+                Category("food", "食品饮料", "food"),
+                Category("books", "图书音像", "book"),
+                Category("home", "家居用品", "home"),
+                Category("beauty", "美妆个护", "face-woman")
+            ]
 
     def save_categories(self):
         """保存分类"""
         try:
-            with open(self.categories_file, 'w', encoding='utf-8') as f:
-                categories_data = [cat.to_dict() for cat in self.categories]
-                json.dump(categories_data, f, ensure_ascii=False, indent=2)
+            self.storage.save('categories', [cat.to_dict() for cat in self.categories])
             return True
         except Exception as e:
             Logger.warning(f"保存分类失败: {e}")
@@ -339,31 +905,57 @@ class InventoryManager:
         )
 
         # 添加到数据库
-        self.db.products[product_id] = new_product
-        self.db.save_product_info()  # 保存
+        self.db.put_product(new_product)
+        self.db.save_product_info([product_id])  # 保存
         return new_product
 
     def update_product_stock(self, product_id: str, new_stock: int):
         """更新商品库存"""
         if product_id in self.db.products:
+            self.storage.on_rollback(
+                lambda stock=self.db.products[product_id].stock: self._restore_stocks({product_id: stock}))
             self.db.products[product_id].stock = new_stock
-            self.db.save_product_info()  # 更新存储商品库存数量
+            self.db.save_product_info([product_id])  # 更新存储商品库存数量
             return True
         return False
 
+    def update_stocks(self, deltas: Dict[str, int]):
+        """
+        批量调整商品库存（全部生效或全部不生效），只写入一次
+
+        Args:
+            deltas: 商品ID -> 库存变化量（负数为扣减），调整后库存不低于0
+        """
+        if any(product_id not in self.db.products for product_id in deltas):
+            return False
+
+        old_stocks = {product_id: self.db.products[product_id].stock for product_id in deltas}
+        self.storage.on_rollback(lambda: self._restore_stocks(old_stocks))
+        for product_id, delta in deltas.items():
+            product = self.db.products[product_id]
+            product.stock = max(product.stock + delta, 0)
+        self.db.save_product_info(list(deltas))
+        return True
+
+    def _restore_stocks(self, stocks: Dict[str, int]):
+        """恢复商品库存（事务回滚时使用）"""
+        for product_id, stock in stocks.items():
+            if product_id in self.db.products:
+                self.db.products[product_id].stock = stock
+
     def update_product_info(self, product: Product):
         """更新商品信息"""
         if product.id in self.db.products:
-            self.db.products[product.id] = product
-            self.db.save_product_info()
+            self.db.put_product(product)
+            self.db.save_product_info([product.id])
             return True
         return False
 
     def delete_product(self, product_id: str):
         """删除商品"""
         if product_id in self.db.products:
-            del self.db.products[product_id]
-            self.db.save_product_info()  # 更新存储商品库存数量
+            self.db.remove_product(product_id)
+            self.db.save_product_info([product_id])  # 更新存储商品库存数量
             return True
         return False
 
@@ -401,10 +993,18 @@ class InventoryManager:
 class Database:
     """模拟数据库"""
 
-    def __init__(self, data_file: str = "/data/products.json"):
+    def __init__(self, data_file: str = "/data/products.json", storage: Optional[Storage] = None):
         self.products_file = str(Path(__file__).parent.parent.parent) + data_file
+        self.storage = storage or JsonStorage({'products': self.products_file})
         # self.products = self._create_sample_products()
         self.products = self.load_product_info()
+        # 二级索引：搜索索引、分类 -> 商品ID（有序集合）、热门商品ID、商品ID -> 已索引的分类
+        self.search_index = SearchIndex()
+        self._by_category: Dict[str, Dict[str, None]] = {}
+        self._featured: Dict[str, None] = {}
+        self._indexed_category: Dict[str, str] = {}
+        for product in self.products.values():
+            self._index_product(product)
         self.users = {}
         self.orders = []
 
@@ -534,18 +1134,79 @@ class Database:
 
         return {p.id: p for p in products}
 
-    def get_products(self, category=None, featured=False):
-        """获取商品列表"""
-        products = list(self.products.values())
-
-        if category:
-            products = [p for p in products if p.category == category]
-
+    @staticmethod
+    def _category_name(category) -> str:
+        return category.value if isinstance(category, ProductCategory) else str(category)
+
+    def _index_product(self, product: Product):
+        """将商品加入分类、热门和搜索索引（已索引的商品先移除旧索引）"""
+        self._unindex_product(product.id)
+        category = self._category_name(product.category)
+        self._by_category.setdefault(category, {})[product.id] = None
+        self._indexed_category[product.id] = category
+        if product.is_featured:
+            self._featured[product.id] = None
+        self.search_index.add(product)
+
+    def _unindex_product(self, product_id: str):
+        category = self._indexed_category.pop(product_id, None)
+        if category is None:
+            return
+        ids = self._by_category[category]
+        ids.pop(product_id, None)
+        if not ids:
+            del self._by_category[category]
+        self._featured.pop(product_id, None)
+        self.search_index.remove(product_id)
+
+    def put_product(self, product: Product):
+        """添加或替换商品，并更新索引"""
+        self.products[product.id] = product
+        self._index_product(product)
+
+    def remove_product(self, product_id: str):
+        """删除商品，并更新索引"""
+        self.products.pop(product_id, None)
+        self._unindex_product(product_id)
+
+    def _filter_ids(self, category=None, featured=False):
+        """按分类/热门筛选出的商品ID（有序），不筛选时返回 None"""
         if featured:
-            products = list(self.products.values())
-            products = [p for p in products if p.is_featured]
+            # "热门" 是伪分类，只有真实分类才与热门条件取交集
+            if category and self._category_name(category) != ProductCategory.FEATURED.value:
+                in_category = self._by_category.get(self._category_name(category), {})
+                return [pid for pid in self._featured if pid in in_category]
+            return self._featured
+        if category:
+            return self._by_category.get(self._category_name(category), {})
+        return None
 
-        return products
+    def get_products(self, category=None, featured=False):
+        """获取商品列表"""
+        ids = self._filter_ids(category, featured)
+        if ids is None:
+            return list(self.products.values())
+        return [self.products[product_id] for product_id in ids]
+
+    def count_by_category(self) -> Dict[str, int]:
+        """各分类的商品数量"""
+        return {category: len(ids) for category, ids in self._by_category.items()}
+
+    def search_products(self, text: str, category=None, featured=False):
+        """按名称/描述搜索商品（按相关度排序），分类名称包含查询串的商品排在其后；可同时按分类或热门筛选"""
+        hits = self.search_index.search(text)
+        query = text.strip().lower()
+        if query:
+            seen = set(hits)
+            for name, in_category in self._by_category.items():
+                if query in name.lower():
+                    hits.extend(product_id for product_id in in_category if product_id not in seen)
+                    seen.update(in_category)
+        ids = self._filter_ids(category, featured)
+        if ids is not None:
+            ids = ids if isinstance(ids, dict) else set(ids)
+            hits = [product_id for product_id in hits if product_id in ids]
+        return [self.products[product_id] for product_id in hits]
 
     def get_product(self, product_id):
         """获取单个商品"""
@@ -560,25 +1221,32 @@ class Database:
     #     return order_data
 
     def load_product_info(self) -> Dict:
-        """从JSON文件加载商品信息"""
-
-        if not os.path.exists(self.products_file):
+        """加载商品信息"""
+        try:
+            products = [Product(**data) for data in self.storage.load('products')]
+            return {p.id: p for p in products}
+        except FileNotFoundError:
             Logger.warning(f"{self.products_file} not exist")
             Logger.warning(f"current path: {str(Path(__file__))}")
             return {}
-
-        try:
-            with open(self.products_file, 'r', encoding='utf-8') as f:
-                sample_data = json.load(f)
-                products = []
-                for data in sample_data:
-                    products.append(Product(**data))
-                return {p.id: p for p in products}
-        except (json.JSONDecodeError, FileNotFoundError):
+        except json.JSONDecodeError:
             return {}
 
-    def save_product_info(self):
-        """保存商品信息"""
-        products_data = [self.products[key].to_dict() for key in self.products.keys()]
-        with open(self.products_file, 'w', encoding='utf-8') as f:
-            json.dump(products_data, f, ensure_ascii=False, indent=2)
+    def save_product_info(self, product_ids: Optional[List[str]] = None):
+        """
+        保存商品信息
+
+        Args:
+            product_ids: 仅写入这些商品（已删除的商品会从存储中移除）；
+                         为 None 或后端不支持单行写入时整表写入
+        """
+        if product_ids is None or not self.storage.supports_row_writes('products'):
+            self.storage.save('products', [product.to_dict() for product in self.products.values()])
+            return
+
+        changed = [self.products[pid].to_dict() for pid in product_ids if pid in self.products]
+        deleted = [pid for pid in product_ids if pid not in self.products]
+        if changed:
+            self.storage.upsert('products', changed)
+        if deleted:
+            self.storage.delete('products', deleted)
@@ -0,0 +1,19 @@
+"""金额工具
+
+模型内部统一用整数“分”计算和累加金额，避免浮点误差在大量订单汇总后累积；
+只在显示和写入 JSON 时换算为以“元”为单位的浮点数，数据文件格式保持不变。
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+
+def to_cents(amount) -> int:
+    """元 -> 分（四舍五入到分）"""
+    if not amount:
+        return 0
+    return int((Decimal(str(amount)) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents: int) -> float:
+    """分 -> 元"""
+    return cents / 100
+
@@ -9,10 +9,15 @@ from kivymd.uix.card import MDCard
 from kivymd.uix.chip import MDChip, MDChipText
 from kivymd.uix.fitimage import FitImage
 from kivy.uix.image import Image
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.recyclegridlayout import RecycleGridLayout
 from kivymd.uix.list import MDList
 from kivymd.uix.scrollview import MDScrollView
 from kivy.metrics import dp, sp
 
+from .thumbnails import ThumbnailImage, get_thumbnail_cache, PLACEHOLDER
+
 import re
 
 class ProductDetailDialog(ModalView):
@@ -75,12 +80,17 @@ class ProductDetailDialog(ModalView):
 
         # 商品大图
         detail_image = FitImage(
-            source=self.product_data.images[0],
+            source=PLACEHOLDER,
             size_hint=(None, None),  # 关键：禁用自动缩放
             size=(sp(200), sp(360)),
             pos_hint={"center_x": 0.5, "center_y": 0.5},
             radius=[dp(15)] * 4
         )
+        # 大图使用缩放后的缓存图片，生成后再替换占位图
+        get_thumbnail_cache().request_path(
+            self.product_data.images[0] if self.product_data.images else "", 720,
+            lambda path: setattr(detail_image, 'source', path)
+        )
 
         # scroll_content = MDBoxLayout(
         #     orientation="vertical",
@@ -209,8 +219,8 @@ class ProductDetailDialog(ModalView):
         app.add_to_cart(self.product_data.id)
 
 
-class ProductCard(MDCard, CommonElevationBehavior):
-    """商品卡片组件"""
+class ProductCard(RecycleDataViewBehavior, MDCard, CommonElevationBehavior):
+    """商品卡片组件（可作为 ProductGrid 的复用视图，属性变化时更新显示内容）"""
     product_id = StringProperty()
     name = StringProperty()
     description = StringProperty()
@@ -233,8 +243,9 @@ class ProductCard(MDCard, CommonElevationBehavior):
         self.bind(on_release=self.show_product_detail)
 
         # 商品图片
-        image = Image(
-            source=self.image_url,
+        self.image = ThumbnailImage(
+            thumb_source=self.image_url,
+            thumb_size=256,
             size_hint=(1, 0.5),
             allow_stretch=True
         )
@@ -243,7 +254,7 @@ class ProductCard(MDCard, CommonElevationBehavior):
         info_layout = BoxLayout(orientation='vertical', size_hint=(1, 0.5))
 
         # 名称
-        name_label = MDLabel(
+        self.name_label = MDLabel(
             text=self.name,
             theme_text_color="Primary",
             font_style="Headline6",
@@ -253,7 +264,7 @@ class ProductCard(MDCard, CommonElevationBehavior):
         )
 
         # 价格
-        price_label = MDLabel(
+        self.price_label = MDLabel(
             text=f"¥{self.price:.1f}",
             theme_text_color="Error",
             font_style="Headline6",
@@ -263,7 +274,7 @@ class ProductCard(MDCard, CommonElevationBehavior):
         )
 
         # 库存
-        stock_label = MDLabel(
+        self.stock_label = MDLabel(
             text=f"库存: {self.stock}",
             theme_text_color="Hint",
             size_hint_y=None,
@@ -283,22 +294,37 @@ class ProductCard(MDCard, CommonElevationBehavior):
         )
         add_btn.bind(on_release=self.add_to_cart)
 
-        info_layout.add_widget(name_label)
-        info_layout.add_widget(price_label)
-        # info_layout.add_widget(stock_label)
+        info_layout.add_widget(self.name_label)
+        info_layout.add_widget(self.price_label)
+        # info_layout.add_widget(self.stock_label)
         info_layout.add_widget(add_btn)
 
-        self.add_widget(image)
+        self.add_widget(self.image)
         self.add_widget(info_layout)
 
+    # 复用时由 RecycleView 设置新的属性值，同步更新子控件
+    def on_name(self, instance, value):
+        if hasattr(self, 'name_label'):
+            self.name_label.text = value
+
+    def on_price(self, instance, value):
+        if hasattr(self, 'price_label'):
+            self.price_label.text = f"¥{value:.1f}"
+
+    def on_stock(self, instance, value):
+        if hasattr(self, 'stock_label'):
+            self.stock_label.text = f"库存: {value}"
+
+    def on_image_url(self, instance, value):
+        if hasattr(self, 'image'):
+            self.image.thumb_source = value
+
     def show_product_detail(self, *args):
         """显示商品详情"""
         from kivy.app import App
         app = App.get_running_app()
 
-        # 获取商品列表
-        products = app.db.get_products()
-        product = next((p for p in products if p.id == self.product_id), None)
+        product = app.db.get_product(self.product_id)
 
         # print(product)
         if product:
@@ -310,3 +336,38 @@ class ProductCard(MDCard, CommonElevationBehavior):
         from kivy.app import App
         app = App.get_running_app()
         app.add_to_cart(self.product_id)
+
+
+class ProductGrid(RecycleView):
+    """商品网格：基于 RecycleView，只创建填满可视区域所需的 ProductCard，滚动时复用并重新绑定数据"""
+
+    def __init__(self, cols=2, **kwargs):
+        super().__init__(**kwargs)
+        self.viewclass = ProductCard
+
+        layout = RecycleGridLayout(
+            cols=cols,
+            spacing=dp(5),
+            padding=dp(5),
+            default_size=(dp(200), dp(240)),
+            default_size_hint=(None, None),
+            size_hint_y=None
+        )
+        layout.bind(minimum_height=layout.setter('height'))
+        self.add_widget(layout)
+
+    def set_products(self, products):
+        """设置要显示的商品"""
+        self.data = [
+            {
+                'product_id': product.id,
+                'name': product.name,
+                'description': product.description,
+                'price': product.price,
+                'image_url': product.images[0] if product.images else "",
+                'rating': product.rating,
+                'stock': product.stock,
+            }
+            for product in products
+        ]
+        self.scroll_y = 1
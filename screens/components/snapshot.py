@@ -0,0 +1,139 @@
+"""紧凑的二进制快照格式
+
+JSON 仍是数据交换格式；快照只是加快冷启动加载和整表保存的本地缓存，可随时从 JSON 重新生成。
+
+文件结构（整数均为小端）：
+    头部    MAGIC(8 字节) | 格式版本 uint32 | 解释器标识(16 字节，如 cpython-311) | 行数 uint64 | 每块行数 uint64 | 块索引偏移 uint64
+    行数据  每 BLOCK_ROWS 行为一块，整块用 marshal 编码（块内重复的字段名和字符串只保存一次，解码时共享同一对象）
+    块索引  (块数 + 1) 个 uint64 偏移量，第 i 块位于 [offsets[i], offsets[i + 1])
+
+读取时用 mmap 映射文件，只解析头部和块索引，各块在访问时才解码（最近解码的一块会被缓存）。
+marshal 格式只保证同一解释器版本内兼容（marshal.version 多个版本都是 4，不能用来判断），
+因此头部记录 sys.implementation.cache_tag，与当前解释器不一致时 read_rows 返回 None，由调用方改为读取 JSON。
+
+转换工具（在项目根目录运行）：
+    python -m screens.components.snapshot to-snapshot data/products.json data/products.snap
+    python -m screens.components.snapshot to-json data/products.snap data/products.json
+"""
+import json
+import marshal
+import mmap
+import os
+import struct
+import sys
+from typing import Dict, List, Optional
+
+MAGIC = b"SCSNAP\x00\x01"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<8sI16sQQQ")
+CACHE_TAG = (sys.implementation.cache_tag or sys.implementation.name).encode('ascii')[:16]
+OFFSET = struct.Struct("<Q")
+BLOCK_ROWS = 256
+
+
+def write_snapshot(path: str, rows: List[Dict]):
+    """写入快照（先写临时文件再替换）"""
+    data_dir = os.path.dirname(path)
+    if data_dir and not os.path.exists(data_dir):
+        os.makedirs(data_dir)
+
+    offsets = []
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(b"\0" * HEADER.size)
+        for start in range(0, len(rows), BLOCK_ROWS):
+            offsets.append(f.tell())
+            f.write(marshal.dumps(rows[start:start + BLOCK_ROWS]))
+        offsets.append(f.tell())
+
+        index_offset = f.tell()
+        f.write(b"".join(OFFSET.pack(offset) for offset in offsets))
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, CACHE_TAG, len(rows), BLOCK_ROWS, index_offset))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class SnapshotReader:
+    """按需解码各行的快照读取器（支持 len、下标和迭代）"""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, cache_tag, count, block_rows, index_offset = HEADER.unpack_from(self._mmap)
+            if magic != MAGIC:
+                raise ValueError(f"不是快照文件: {path}")
+            self.compatible = version == FORMAT_VERSION and cache_tag.rstrip(b"\0") == CACHE_TAG
+            self._count = count
+            self._block_rows = block_rows
+            self._blocks = -(-count // block_rows) if block_rows else 0
+            self._cached = (None, None)  # (块编号, 块内各行)
+            if self.compatible:
+                self._offsets = [offset for (offset,) in OFFSET.iter_unpack(
+                    self._mmap[index_offset:index_offset + (self._blocks + 1) * OFFSET.size])]
+        except Exception:
+            self._mmap.close()
+            raise
+
+    def __len__(self):
+        return self._count
+
+    def _block(self, n: int) -> List[Dict]:
+        if self._cached[0] != n:
+            self._cached = (n, marshal.loads(self._mmap[self._offsets[n]:self._offsets[n + 1]]))
+        return self._cached[1]
+
+    def __getitem__(self, i: int) -> Dict:
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        return self._block(i // self._block_rows)[i % self._block_rows]
+
+    def __iter__(self):
+        for n in range(self._blocks):
+            yield from marshal.loads(self._mmap[self._offsets[n]:self._offsets[n + 1]])
+
+    def close(self):
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def read_rows(path: str) -> Optional[List[Dict]]:
+    """读取快照中的全部行；快照由其它 Python 版本生成时返回 None"""
+    with SnapshotReader(path) as reader:
+        if not reader.compatible:
+            return None
+        return list(reader)
+
+
+def main(argv: List[str]) -> int:
+    if len(argv) != 3 or argv[0] not in ("to-snapshot", "to-json"):
+        print("用法: python -m screens.components.snapshot to-snapshot|to-json <输入文件> <输出文件>")
+        return 2
+    command, source, target = argv
+    if command == "to-snapshot":
+        with open(source, 'r', encoding='utf-8') as f:
+            rows = json.load(f)
+        write_snapshot(target, rows)
+    else:
+        rows = read_rows(source)
+        if rows is None:
+            print(f"{source} 由其它版本的 Python 生成，无法读取")
+            return 1
+        with open(target, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+    print(f"已转换 {len(rows)} 条记录: {source} -> {target}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,721 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from kivy.clock import Clock
+from kivy.logger import Logger
+
+from .snapshot import write_snapshot, read_rows
+
+
+# 数据目录（项目根目录下的 data 文件夹）
+DATA_DIR = str(Path(__file__).parent.parent.parent) + "/data"
+
+# 各数据表的主键字段
+TABLE_KEYS = {
+    'products': 'id',
+    'orders': 'order_id',
+    'users': 'phone',
+    'categories': 'id',
+    'order_stats': 'month',
+}
+
+
+class Transaction:
+    """事务：缓冲块内的写入操作，并记录出错时用于恢复内存状态的回滚操作"""
+
+    def __init__(self):
+        self.ops = []  # (操作, 表名, 数据)
+        self._undo = []
+
+    def on_rollback(self, callback):
+        self._undo.append(callback)
+
+    def rollback(self):
+        """按与修改相反的顺序执行回滚操作"""
+        for callback in reversed(self._undo):
+            callback()
+        self._undo.clear()
+        self.ops.clear()
+
+
+class Storage:
+    """存储后端基类，按表读写字典记录
+
+    写操作在 transaction() 块内会被缓冲，块正常结束时一次提交；
+    子类实现 _save/_upsert/_delete 完成实际写入。
+    """
+
+    _tx: Optional[Transaction] = None
+
+    def load(self, table: str) -> List[Dict]:
+        """读取整张表"""
+        raise NotImplementedError
+
+    def save(self, table: str, rows: List[Dict]):
+        """整表覆盖写入"""
+        if self._tx is not None:
+            self._tx.ops.append(('save', table, list(rows)))
+        else:
+            self._save(table, rows)
+
+    def supports_row_writes(self, table: str) -> bool:
+        """是否支持单行写入（upsert/delete）"""
+        return False
+
+    def upsert(self, table: str, rows: Iterable[Dict]):
+        """插入或更新若干行"""
+        if self._tx is not None:
+            self._tx.ops.append(('upsert', table, list(rows)))
+        else:
+            self._upsert(table, rows)
+
+    def delete(self, table: str, keys: Iterable[str]):
+        """按主键删除若干行"""
+        if self._tx is not None:
+            self._tx.ops.append(('delete', table, list(keys)))
+        else:
+            self._delete(table, keys)
+
+    def _save(self, table: str, rows: List[Dict]):
+        raise NotImplementedError
+
+    def _upsert(self, table: str, rows: Iterable[Dict]):
+        raise NotImplementedError
+
+    def _delete(self, table: str, keys: Iterable[str]):
+        raise NotImplementedError
+
+    def _apply(self, ops):
+        """依次执行缓冲的写入操作"""
+        for op, table, data in ops:
+            getattr(self, '_' + op)(table, data)
+
+    def _commit(self, ops):
+        """提交事务中缓冲的写入，子类负责保证原子性"""
+        self._apply(ops)
+
+    @contextmanager
+    def transaction(self):
+        """
+        事务上下文：块内的写入在退出时一次提交；块内抛出异常或提交失败时丢弃写入，
+        并执行通过 on_rollback 登记的操作恢复内存状态。嵌套调用并入外层事务。
+        """
+        if self._tx is not None:
+            yield self._tx
+            return
+
+        tx = self._tx = Transaction()
+        try:
+            yield tx
+            self._tx = None
+            if tx.ops:
+                self._commit(tx.ops)
+        except BaseException:
+            self._tx = None
+            tx.rollback()
+            raise
+        finally:
+            self._tx = None
+
+    def on_rollback(self, callback):
+        """在当前事务中登记回滚操作（不在事务中时忽略）"""
+        if self._tx is not None:
+            self._tx.on_rollback(callback)
+
+    def flush(self):
+        """将缓冲的写入落盘"""
+
+    def close(self):
+        """关闭后端（应用退出时调用）"""
+        self.flush()
+
+    def copy_to(self, other: "Storage"):
+        """将全部数据复制到另一个后端（用于 JSON 导入/导出）"""
+        for table in TABLE_KEYS:
+            try:
+                rows = self.load(table)
+            except FileNotFoundError:
+                continue
+            other.save(table, rows)
+
+
+class JsonStorage(Storage):
+    """JSON 文件存储
+
+    每张表对应 data 目录下的一个 JSON 文件。订单表和订单月度汇总表使用 "快照 + 日志" 的方式：
+    新增/删除以 JSON-lines 记录追加到日志文件，加载时先读快照再重放日志，
+    日志记录数超过阈值时合并为新的快照。其余表整表覆盖写入。
+
+    开启 snapshots 时整表保存写入同名的 .snap 二进制快照（见 snapshot.py），不再生成 JSON；
+    加载时快照不旧于 JSON 文件则读取快照，否则读取 JSON（手动替换的 JSON 文件仍然生效）。
+
+    事务提交时先将全部写入操作原子地写入 transaction.json（重做日志），再依次执行，
+    完成后删除该文件；启动时若发现残留的重做日志则重新执行，保证多文件写入要么全部生效。
+    重做日志中非日志表的整表保存只记录与磁盘内容相比变化的行（重做时合并到表中），不重复写入整表。
+    重做日志落盘后事务即视为已提交：之后的执行失败不再抛出异常（内存状态不回滚），
+    重做日志保留，在之后任何写入之前先重新执行；重新执行仍失败时该写入抛出异常，
+    保证重做日志不会覆盖比它更新的写入。
+    """
+
+    # 使用追加日志的表
+    JOURNALED_TABLES = ('orders', 'order_stats')
+    # 日志累计多少条记录后执行一次 fsync
+    FSYNC_BATCH = 8
+    # 距离上次 fsync 超过该秒数时强制 fsync
+    FSYNC_INTERVAL = 2.0
+    # 日志记录数超过该值时合并为快照
+    COMPACT_THRESHOLD = 200
+
+    def __init__(self, paths: Optional[Dict[str, str]] = None, data_dir: str = DATA_DIR, snapshots: bool = False):
+        """
+        Args:
+            paths: 表名到文件路径的映射，未指定的表使用 data_dir 下的 <表名>.json
+            data_dir: 默认数据目录
+            snapshots: 是否使用二进制快照保存整表
+        """
+        self.snapshots = snapshots
+        self.paths = {table: os.path.join(data_dir, f"{table}.json") for table in TABLE_KEYS}
+        self.paths.update(paths or {})
+        self._journals = {}  # 表名 -> 日志文件句柄（追加模式，按需打开）
+        self._journal_records = {table: 0 for table in self.JOURNALED_TABLES}  # 当前日志中的记录数
+        self._unsynced = {table: 0 for table in self.JOURNALED_TABLES}  # 尚未 fsync 的记录数
+        self._last_sync = time.monotonic()
+        self._unfinished = []  # 已提交但尚未执行成功的写入（重做日志中的内容）
+        self._replaying = False
+        self._tables = {}  # 非日志表 -> {主键: 行}，与磁盘上的内容一致
+        self.transaction_path = os.path.join(data_dir, "transaction.json")
+        self._recover()
+
+    def journal_path(self, table: str) -> str:
+        return os.path.splitext(self.paths[table])[0] + ".jsonl"
+
+    def snapshot_path(self, table: str) -> str:
+        return os.path.splitext(self.paths[table])[0] + ".snap"
+
+    def _read_table(self, table: str) -> List[Dict]:
+        """读取整表（二进制快照或 JSON 文件），都不存在时抛出 FileNotFoundError"""
+        path = self.paths[table]
+        snapshot_path = self.snapshot_path(table)
+        if os.path.exists(snapshot_path) and (
+                not os.path.exists(path) or os.path.getmtime(snapshot_path) >= os.path.getmtime(path)):
+            try:
+                rows = read_rows(snapshot_path)
+                if rows is not None:
+                    return rows
+                Logger.warning(f"快照由其它版本的 Python 生成，改为读取JSON: {snapshot_path}")
+            except (OSError, ValueError) as e:
+                Logger.warning(f"读取快照失败，改为读取JSON: {snapshot_path}, {e}")
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _remember(self, table: str, rows: List[Dict]):
+        """记录非日志表在磁盘上的内容（浅复制，调用方之后修改返回的行不影响比较）"""
+        key = TABLE_KEYS[table]
+        self._tables[table] = {row[key]: dict(row) for row in rows}
+
+    def load(self, table: str) -> List[Dict]:
+        """读取快照；使用日志的表在快照之后重放日志。文件不存在时抛出 FileNotFoundError"""
+        if table not in self.JOURNALED_TABLES:
+            rows = self._read_table(table)
+            self._remember(table, rows)
+            return rows
+
+        try:
+            rows = self._read_table(table)
+        except FileNotFoundError:
+            rows = []
+
+        self._journal_records[table] = 0
+        journal_path = self.journal_path(table)
+        if os.path.exists(journal_path):
+            key = TABLE_KEYS[table]
+            index = {row[key]: i for i, row in enumerate(rows)}
+            with open(journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 崩溃时可能留下不完整的最后一行，忽略
+                        continue
+                    self._journal_records[table] += 1
+                    if record.get('op') == 'add':
+                        row = record['row']
+                        pos = index.get(row[key])
+                        if pos is None:
+                            index[row[key]] = len(rows)
+                            rows.append(row)
+                        else:
+                            rows[pos] = row
+                    elif record.get('op') == 'delete':
+                        pos = index.pop(record.get('key'), None)
+                        if pos is not None:
+                            rows[pos] = None
+            rows = [row for row in rows if row is not None]
+        return rows
+
+    @staticmethod
+    def _write_json(path: str, data, indent: Optional[int] = 2):
+        """写入JSON文件（先写临时文件再替换）"""
+        data_dir = os.path.dirname(path)
+        if data_dir and not os.path.exists(data_dir):
+            os.makedirs(data_dir)
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _save(self, table: str, rows: List[Dict]):
+        """整表写入；使用日志的表同时清空日志"""
+        self._finish_pending()
+        if self.snapshots:
+            write_snapshot(self.snapshot_path(table), rows)
+        else:
+            self._write_json(self.paths[table], rows)
+            # 删除旧的快照，避免之后开启快照时读到过期数据
+            if os.path.exists(self.snapshot_path(table)):
+                os.remove(self.snapshot_path(table))
+
+        if table in self.JOURNALED_TABLES:
+            self._truncate_journal(table)
+        else:
+            self._remember(table, rows)
+
+    def supports_row_writes(self, table: str) -> bool:
+        return table in self.JOURNALED_TABLES
+
+    def _upsert(self, table: str, rows: Iterable[Dict]):
+        self._finish_pending()
+        for row in rows:
+            self._append_journal(table, {'op': 'add', 'row': row})
+
+    def _delete(self, table: str, keys: Iterable[str]):
+        self._finish_pending()
+        for key in keys:
+            self._append_journal(table, {'op': 'delete', 'key': key})
+
+    def _merge(self, table: str, changes: Dict):
+        """将变化的行合并到整表后写入（重做日志中的整表保存）"""
+        rows = self._tables.get(table)
+        if rows is None:
+            try:
+                rows = {row[TABLE_KEYS[table]]: row for row in self._read_table(table)}
+            except FileNotFoundError:
+                rows = {}
+        rows = dict(rows)
+        for key in changes['deleted']:
+            rows.pop(key, None)
+        for row in changes['rows']:
+            rows[row[TABLE_KEYS[table]]] = row
+        self._save(table, list(rows.values()))
+
+    def _redo_ops(self, ops) -> List:
+        """生成重做日志：非日志表的整表保存改为只记录相对磁盘内容变化和删除的行"""
+        tables = {}  # 表名 -> 事务中前面的写入执行后的内容
+        redo = []
+        for op, table, data in ops:
+            if op != 'save' or table in self.JOURNALED_TABLES:
+                redo.append([op, table, data])
+                continue
+            key = TABLE_KEYS[table]
+            old = tables.get(table, self._tables.get(table))
+            new = {row[key]: row for row in data}
+            if old is None:
+                redo.append([op, table, data])
+            else:
+                redo.append(['merge', table, {
+                    'rows': [row for k, row in new.items() if old.get(k) != row],
+                    'deleted': [k for k in old if k not in new],
+                }])
+            tables[table] = new
+        return redo
+
+    def _commit(self, ops):
+        """先重做上次未执行成功的写入，再写入重做日志作为提交点并执行各项写入"""
+        self._finish_pending()
+        redo = self._redo_ops(ops)
+        self._write_json(self.transaction_path, redo, indent=None)
+        try:
+            self._roll_forward(ops)
+        except Exception as e:
+            Logger.warning(f"执行已提交的事务失败，稍后重试: {e}")
+            self._unfinished = redo
+
+    def _roll_forward(self, ops):
+        """执行已提交的写入并删除重做日志"""
+        self._replaying = True
+        try:
+            self._apply(ops)
+        finally:
+            self._replaying = False
+        self._sync()
+        os.remove(self.transaction_path)
+
+    def _finish_pending(self):
+        """重新执行尚未执行成功的已提交写入，仍失败时抛出异常（之后的写入不能越过重做日志）"""
+        if self._replaying or not self._unfinished:
+            return
+        self._roll_forward(self._unfinished)
+        self._unfinished = []
+
+    def _recover(self):
+        """重新执行上次未完成的事务（重做日志存在时，磁盘上没有比它更新的写入）"""
+        if not os.path.exists(self.transaction_path):
+            return
+        try:
+            with open(self.transaction_path, 'r', encoding='utf-8') as f:
+                ops = json.load(f)
+        except json.JSONDecodeError:
+            # 提交点之前崩溃，事务未生效
+            ops = []
+        if not ops:
+            os.remove(self.transaction_path)
+            return
+        Logger.info(f"恢复未完成的事务: {len(ops)} 项写入")
+        self._unfinished = ops
+        try:
+            self._finish_pending()
+        except Exception as e:
+            Logger.warning(f"恢复未完成的事务失败，稍后重试: {e}")
+
+    def _truncate_journal(self, table: str):
+        """快照写入后清空日志"""
+        journal = self._journals.pop(table, None)
+        if journal is not None:
+            journal.close()
+        journal_path = self.journal_path(table)
+        if os.path.exists(journal_path):
+            os.remove(journal_path)
+        self._journal_records[table] = 0
+        self._unsynced[table] = 0
+
+    def _append_journal(self, table: str, record: Dict):
+        """追加一条日志记录，按批次 fsync，超过阈值时合并快照"""
+        journal = self._journals.get(table)
+        if journal is None:
+            journal = self._journals[table] = open(self.journal_path(table), 'a', encoding='utf-8')
+        journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+        journal.flush()
+        self._journal_records[table] += 1
+        self._unsynced[table] += 1
+        if (self._unsynced[table] >= self.FSYNC_BATCH
+                or time.monotonic() - self._last_sync >= self.FSYNC_INTERVAL):
+            self._sync()
+
+        if self._journal_records[table] >= self.COMPACT_THRESHOLD:
+            self.compact(table)
+
+    def compact(self, table: str):
+        """将日志合并为新的快照"""
+        self._save(table, self.load(table))
+
+    def _sync(self):
+        """将日志中尚未落盘的记录 fsync 到磁盘"""
+        for table, journal in self._journals.items():
+            if self._unsynced[table]:
+                os.fsync(journal.fileno())
+                self._unsynced[table] = 0
+        self._last_sync = time.monotonic()
+
+    def flush(self):
+        """日志落盘，并重试尚未执行成功的已提交事务（仍失败时保留重做日志，下次启动时重试）"""
+        self._sync()
+        try:
+            self._finish_pending()
+        except Exception as e:
+            Logger.warning(f"执行已提交的事务失败: {e}")
+
+    def close(self):
+        self.flush()
+        for journal in self._journals.values():
+            journal.close()
+        self._journals.clear()
+
+
+class SqliteStorage(Storage):
+    """SQLite 存储（WAL 模式）
+
+    每张表保存主键、若干带索引的查询列以及完整记录的 JSON（data 列）；
+    订单明细额外写入 order_items 表。首次创建数据库时从 JSON 文件导入数据。
+    """
+
+    # 表名 -> 除主键外需要单独存储（并建立索引）的列
+    COLUMNS = {
+        'products': ('name', 'category', 'is_featured', 'stock', 'price'),
+        'orders': ('user_phone', 'status', 'total', 'created_at'),
+        'users': ('username',),
+        'categories': ('name',),
+        'order_stats': (),
+    }
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS products (
+            id TEXT PRIMARY KEY, name TEXT, category TEXT, is_featured INTEGER,
+            stock INTEGER, price REAL, data TEXT NOT NULL);
+        CREATE INDEX IF NOT EXISTS idx_products_category ON products(category);
+        CREATE INDEX IF NOT EXISTS idx_products_featured ON products(is_featured);
+
+        CREATE TABLE IF NOT EXISTS orders (
+            order_id TEXT PRIMARY KEY, user_phone TEXT, status TEXT, total REAL,
+            created_at TEXT, data TEXT NOT NULL);
+        CREATE INDEX IF NOT EXISTS idx_orders_user_phone ON orders(user_phone);
+        CREATE INDEX IF NOT EXISTS idx_orders_created_at ON orders(created_at);
+        CREATE INDEX IF NOT EXISTS idx_orders_status ON orders(status);
+
+        CREATE TABLE IF NOT EXISTS order_items (
+            order_id TEXT NOT NULL, product_id TEXT, quantity INTEGER, price REAL);
+        CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items(order_id);
+        CREATE INDEX IF NOT EXISTS idx_order_items_product ON order_items(product_id);
+
+        CREATE TABLE IF NOT EXISTS users (
+            phone TEXT PRIMARY KEY, username TEXT, data TEXT NOT NULL);
+        CREATE INDEX IF NOT EXISTS idx_users_username ON users(username);
+
+        CREATE TABLE IF NOT EXISTS categories (
+            id TEXT PRIMARY KEY, name TEXT, data TEXT NOT NULL);
+        CREATE INDEX IF NOT EXISTS idx_categories_name ON categories(name);
+
+        CREATE TABLE IF NOT EXISTS order_stats (month TEXT PRIMARY KEY, data TEXT NOT NULL);
+    """
+
+    def __init__(self, db_file: str = DATA_DIR + "/shop.db", import_from: Optional[Storage] = None):
+        """
+        Args:
+            db_file: 数据库文件路径
+            import_from: 新建数据库时从该后端导入数据，默认使用 data 目录下的 JSON 文件
+        """
+        self.db_file = db_file
+        if not os.path.exists(db_file):
+            self._create(db_file, import_from or JsonStorage())
+            Logger.info(f"已从JSON导入数据到 {db_file}")
+
+        # 连接可能被后台线程使用，统一由锁串行化
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+    @classmethod
+    def _create(cls, db_file: str, source: Storage):
+        """在临时文件中建库并导入数据，成功后再替换为正式文件（导入失败时不留下空数据库）"""
+        tmp_file = db_file + ".tmp"
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        conn = sqlite3.connect(tmp_file)
+        try:
+            conn.executescript(cls.SCHEMA)
+            storage = cls.__new__(cls)
+            storage._lock = threading.RLock()
+            storage._conn = conn
+            source.copy_to(storage)
+            conn.close()
+            os.replace(tmp_file, db_file)
+        except BaseException:
+            conn.close()
+            os.remove(tmp_file)
+            raise
+
+    def _row_values(self, table: str, row: Dict):
+        values = [row[TABLE_KEYS[table]]]
+        for column in self.COLUMNS[table]:
+            value = row.get(column)
+            values.append(int(value) if isinstance(value, bool) else value)
+        values.append(json.dumps(row, ensure_ascii=False))
+        return values
+
+    def _write_rows(self, table: str, rows: Iterable[Dict]):
+        key = TABLE_KEYS[table]
+        columns = self.COLUMNS[table] + ('data',)
+        placeholders = ", ".join("?" * (len(columns) + 1))
+        updates = ", ".join(f"{c} = excluded.{c}" for c in columns)
+        sql = (f"INSERT INTO {table} ({key}, {', '.join(columns)}) VALUES ({placeholders}) "
+               f"ON CONFLICT({key}) DO UPDATE SET {updates}")
+        rows = list(rows)
+        self._conn.executemany(sql, [self._row_values(table, row) for row in rows])
+
+        if table == 'orders':
+            self._conn.executemany("DELETE FROM order_items WHERE order_id = ?",
+                                   [(row['order_id'],) for row in rows])
+            self._conn.executemany(
+                "INSERT INTO order_items (order_id, product_id, quantity, price) VALUES (?, ?, ?, ?)",
+                [(row['order_id'], item.get('product_id'), item.get('quantity'), item.get('price'))
+                 for row in rows for item in row.get('items', [])])
+
+    def load(self, table: str) -> List[Dict]:
+        with self._lock:
+            cursor = self._conn.execute(f"SELECT data FROM {table} ORDER BY rowid")
+            return [json.loads(data) for (data,) in cursor]
+
+    def _save_rows(self, table: str, rows: List[Dict]):
+        self._conn.execute(f"DELETE FROM {table}")
+        if table == 'orders':
+            self._conn.execute("DELETE FROM order_items")
+        self._write_rows(table, rows)
+
+    def _delete_rows(self, table: str, keys: Iterable[str]):
+        keys = [(key,) for key in keys]
+        self._conn.executemany(f"DELETE FROM {table} WHERE {TABLE_KEYS[table]} = ?", keys)
+        if table == 'orders':
+            self._conn.executemany("DELETE FROM order_items WHERE order_id = ?", keys)
+
+    def supports_row_writes(self, table: str) -> bool:
+        return True
+
+    def _save(self, table: str, rows: List[Dict]):
+        with self._lock, self._conn:
+            self._save_rows(table, rows)
+
+    def _upsert(self, table: str, rows: Iterable[Dict]):
+        with self._lock, self._conn:
+            self._write_rows(table, rows)
+
+    def _delete(self, table: str, keys: Iterable[str]):
+        with self._lock, self._conn:
+            self._delete_rows(table, keys)
+
+    def _commit(self, ops):
+        """在一个数据库事务中执行全部写入"""
+        writers = {'save': self._save_rows, 'upsert': self._write_rows, 'delete': self._delete_rows}
+        with self._lock, self._conn:
+            for op, table, data in ops:
+                writers[op](table, data)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class BackgroundStorage(Storage):
+    """在单个后台写线程中执行写入的存储包装
+
+    单独的 save/upsert/delete 只是把写入放入队列并立即返回，由写线程依次交给内层后端执行，
+    主线程不再等待磁盘。队列会合并写入：同一张表的整表保存到达时，丢弃该表尚未开始执行的
+    单独写入（最新的快照生效）。这些写入失败时记录日志，并通过 Clock.schedule_once
+    在主线程中调用 on_error(错误, 表名列表)。
+
+    事务提交同样排队由写线程执行（保持与之前写入的顺序），但会等待执行完成，
+    失败时在提交处重新抛出异常，由 transaction() 回滚内存状态。
+
+    读取前会先等待队列中的写入完成；flush()/close() 等待全部写入落盘（应用退出时调用）。
+    """
+
+    def __init__(self, inner: Storage, on_error=None):
+        self.inner = inner
+        self.on_error = on_error
+        self._queue = []  # (操作, 表名, 数据, 结果)，操作为 'commit' 时数据为事务中的写入列表
+        self._busy = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="storage-writer", daemon=True)
+        self._thread.start()
+
+    def _enqueue(self, op: str, table: Optional[str], data, result: Optional[Dict] = None):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("存储已关闭")
+            if op == 'save':
+                self._queue = [item for item in self._queue if item[0] == 'commit' or item[1] != table]
+            self._queue.append((op, table, data, result))
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                op, table, data, result = self._queue.pop(0)
+                self._busy = True
+            try:
+                if op == 'commit':
+                    self.inner._commit(data)
+                else:
+                    getattr(self.inner, '_' + op)(table, data)
+            except Exception as e:
+                if result is not None:
+                    # 等待中的事务提交自行处理异常
+                    result['error'] = e
+                    continue
+                tables = sorted({item[1] for item in data}) if op == 'commit' else [table]
+                Logger.warning(f"后台保存 {', '.join(tables)} 失败: {e}")
+                if self.on_error is not None:
+                    Clock.schedule_once(lambda dt, e=e, tables=tables: self.on_error(e, tables))
+            finally:
+                with self._cond:
+                    self._busy = False
+                    if result is not None:
+                        result['done'] = True
+                    self._cond.notify_all()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待队列中的写入全部执行完，返回是否在超时前完成"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._busy, timeout)
+
+    def load(self, table: str) -> List[Dict]:
+        self.wait()
+        return self.inner.load(table)
+
+    def supports_row_writes(self, table: str) -> bool:
+        return self.inner.supports_row_writes(table)
+
+    # 入队时复制各行（浅复制），之后主线程对内存对象的修改不影响正在写入的数据
+    def _save(self, table: str, rows: List[Dict]):
+        self._enqueue('save', table, [dict(row) for row in rows])
+
+    def _upsert(self, table: str, rows: Iterable[Dict]):
+        self._enqueue('upsert', table, [dict(row) for row in rows])
+
+    def _delete(self, table: str, keys: Iterable[str]):
+        self._enqueue('delete', table, list(keys))
+
+    def _commit(self, ops):
+        """排队提交事务并等待写线程执行完，失败时抛出写线程中的异常"""
+        result = {'done': False, 'error': None}
+        self._enqueue('commit', None, [(op, table, [dict(row) for row in data] if op != 'delete' else data)
+                                       for op, table, data in ops], result)
+        with self._cond:
+            self._cond.wait_for(lambda: result['done'])
+        if result['error'] is not None:
+            raise result['error']
+
+    def flush(self):
+        self.wait()
+        self.inner.flush()
+
+    def close(self):
+        """写完队列中的全部写入后停止写线程并关闭内层后端"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self.inner.close()
+
+
+def open_storage(kind: Optional[str] = None, background: Optional[bool] = None) -> Storage:
+    """
+    创建存储后端
+
+    Args:
+        kind: "json" 或 "sqlite"，默认读取环境变量 SHOPPING_CART_STORAGE（未设置时为 json）
+        background: 是否在后台线程中写入，默认读取环境变量 SHOPPING_CART_BACKGROUND_WRITES（未设置时开启）
+    """
+    kind = (kind or os.environ.get("SHOPPING_CART_STORAGE", "json")).lower()
+    if kind == "sqlite":
+        storage = SqliteStorage()
+    else:
+        # 环境变量 SHOPPING_CART_SNAPSHOTS=1 时整表保存为二进制快照
+        storage = JsonStorage(snapshots=os.environ.get("SHOPPING_CART_SNAPSHOTS", "0") == "1")
+    if background is None:
+        background = os.environ.get("SHOPPING_CART_BACKGROUND_WRITES", "1") != "0"
+    return BackgroundStorage(storage) if background else storage
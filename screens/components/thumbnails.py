@@ -0,0 +1,243 @@
+"""商品图片缩略图缓存
+
+- 磁盘缓存：按 原图路径 + 修改时间 + 目标尺寸 生成缓存文件名，缩略图在后台线程中生成，
+  原图更新后自动生成新的缩略图；未安装 Pillow 时直接使用原图。
+- 内存缓存：已加载的纹理按 LRU 保存，总大小（宽 x 高 x 4 字节）不超过预算。
+- 图片文件在后台线程中解码（ImageLoader，不依赖 Pillow），主线程只用解码好的数据创建纹理；
+  图片损坏或无法读取时改用占位图。
+- 本地路径按 kivy resource_find 的规则查找；http(s) 等远程图片不生成缩略图，
+  与 AsyncImage 一样交给 kivy.loader.Loader 下载和解码。
+- ThumbnailImage：先显示占位图，缩略图就绪后在主线程中替换纹理。
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from kivy.clock import Clock
+from kivy.core.image import Image as CoreImage, ImageLoader
+from kivy.loader import Loader
+from kivy.logger import Logger
+from kivy.properties import StringProperty, NumericProperty
+from kivy.resources import resource_find
+from kivy.uix.image import Image
+
+from .storage import DATA_DIR
+
+try:
+    from PIL import Image as PILImage
+except ImportError:  # 未安装 Pillow 时不生成缩略图
+    PILImage = None
+
+THUMB_DIR = DATA_DIR + "/thumbs"
+PLACEHOLDER = str(Path(__file__).parent.parent) + "/assets/image/no_pic.jpg"
+
+
+def is_remote(source: str) -> bool:
+    """是否为远程图片（Loader 支持下载的 http(s)、ftp、smb 地址）"""
+    return source.split("://", 1)[0].lower() in ("http", "https", "ftp", "smb")
+
+
+class ThumbnailCache:
+    """缩略图缓存（磁盘 + 内存 LRU 纹理）"""
+
+    def __init__(self, cache_dir: str = THUMB_DIR, max_bytes: int = 32 * 1024 * 1024, workers: int = 2):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail")
+        self._lock = threading.Lock()
+        self._pending = {}  # (类型, 原图, 尺寸) -> 等待结果的回调列表
+        self._paths = {}  # (原图, 尺寸) -> 已生成的缩略图路径
+        self._textures = OrderedDict()  # (缩略图路径) -> 纹理
+        self._texture_bytes = 0
+
+    def thumbnail_path(self, source: str, size: int) -> str:
+        """生成（或直接返回已有的）缩略图，返回可加载的图片路径（远程图片原样返回）；在后台线程中调用"""
+        if source and is_remote(source):
+            return source
+        source = (resource_find(source) if source else None) or PLACEHOLDER
+        if PILImage is None:
+            return source
+
+        stat = os.stat(source)
+        key = f"{os.path.abspath(source)}|{stat.st_mtime_ns}|{size}"
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        path = os.path.join(self.cache_dir, name + ".png")
+        if os.path.exists(path):
+            return path
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with PILImage.open(source) as img:
+                img.thumbnail((size, size))
+                if img.mode not in ("RGB", "RGBA"):
+                    img = img.convert("RGBA")
+                tmp_path = path + f".{threading.get_ident()}.tmp"
+                img.save(tmp_path, format="PNG")
+            os.replace(tmp_path, path)
+            return path
+        except Exception as e:
+            Logger.warning(f"生成缩略图失败: {source}, {e}")
+            return source
+
+    def _submit(self, key, job, callback):
+        """在后台线程中执行 job()，callback(结果) 在主线程中调用；相同请求只执行一次"""
+        with self._lock:
+            if key in self._pending:
+                self._pending[key].append(callback)
+                return
+            self._pending[key] = [callback]
+
+        def run():
+            result = job()
+            with self._lock:
+                callbacks = self._pending.pop(key, [])
+
+            def deliver(dt):
+                for cb in callbacks:
+                    cb(result)
+
+            Clock.schedule_once(deliver)
+
+        self._executor.submit(run)
+
+    def _safe_thumbnail_path(self, source: str, size: int) -> str:
+        try:
+            return self.thumbnail_path(source, size)
+        except Exception as e:
+            Logger.warning(f"生成缩略图失败: {source}, {e}")
+            return PLACEHOLDER
+
+    def request_path(self, source: str, size: int, callback):
+        """异步获取缩略图路径，callback(path) 在主线程中调用；相同请求只生成一次"""
+        self._submit(('path', source, size), lambda: self._safe_thumbnail_path(source, size), callback)
+
+    @staticmethod
+    def _decode(path: str):
+        """解码图片文件（后台线程中调用），失败时解码占位图"""
+        try:
+            return path, ImageLoader.load(path, keep_data=True, nocache=True)
+        except Exception as e:
+            Logger.warning(f"加载图片失败: {path}, {e}")
+        try:
+            return PLACEHOLDER, ImageLoader.load(PLACEHOLDER, keep_data=True, nocache=True)
+        except Exception as e:
+            Logger.warning(f"加载占位图失败: {e}")
+            return PLACEHOLDER, None
+
+    def _add_texture(self, path: str, texture):
+        self._textures[path] = texture
+        self._texture_bytes += texture.width * texture.height * 4
+        # 超出预算时淘汰最久未使用的纹理
+        while self._texture_bytes > self.max_bytes and len(self._textures) > 1:
+            _, old = self._textures.popitem(last=False)
+            self._texture_bytes -= old.width * old.height * 4
+
+    def get_texture(self, path: str):
+        """从内存缓存或文件同步加载纹理（主线程中调用，只用于小图片如占位图），失败时返回占位图"""
+        texture = self._textures.get(path)
+        if texture is not None:
+            self._textures.move_to_end(path)
+            return texture
+        try:
+            texture = CoreImage(path).texture
+        except Exception as e:
+            Logger.warning(f"加载图片失败: {path}, {e}")
+            return self.placeholder() if path != PLACEHOLDER else None
+        self._add_texture(path, texture)
+        return texture
+
+    def _request_remote(self, source: str, callback):
+        """远程图片：与 AsyncImage 相同，由 Loader 在后台下载和解码，失败时使用占位图"""
+        proxy = Loader.image(source)
+
+        def on_load(*args):
+            callback(proxy.image.texture or self.placeholder())
+
+        def on_error(*args):
+            Logger.warning(f"加载远程图片失败: {source}")
+            callback(self.placeholder())
+
+        if proxy.loaded:
+            on_load()
+        else:
+            proxy.bind(on_load=on_load, on_error=on_error)
+
+    def request_texture(self, source: str, size: int, callback):
+        """获取缩略图纹理，callback(texture) 在主线程中调用；纹理已在内存中时立即回调"""
+        if source and is_remote(source):
+            self._request_remote(source, callback)
+            return
+        key = (source, size)
+        path = self._paths.get(key)
+        if path is not None and path in self._textures:
+            callback(self.get_texture(path))
+            return
+
+        def load():
+            # 后台线程：生成缩略图并解码
+            return self._decode(self._safe_thumbnail_path(source, size))
+
+        def on_loaded(result):
+            path, image = result
+            self._paths[key] = path
+            texture = self._textures.get(path)
+            if texture is None:
+                try:
+                    texture = CoreImage(image).texture
+                except Exception as e:
+                    Logger.warning(f"创建纹理失败: {path}, {e}")
+                    callback(self.placeholder())
+                    return
+                self._add_texture(path, texture)
+            else:
+                self._textures.move_to_end(path)
+            callback(texture)
+
+        self._submit(('texture', source, size), load, on_loaded)
+
+    def placeholder(self):
+        """占位图纹理"""
+        return self.get_texture(PLACEHOLDER)
+
+
+_cache = None
+
+
+def get_thumbnail_cache() -> ThumbnailCache:
+    """全局缩略图缓存"""
+    global _cache
+    if _cache is None:
+        _cache = ThumbnailCache()
+    return _cache
+
+
+class ThumbnailImage(Image):
+    """异步加载缩略图的图片组件（复用时只需修改 thumb_source）"""
+    thumb_source = StringProperty()
+    thumb_size = NumericProperty(256)
+
+    def __init__(self, **kwargs):
+        # 其它属性（如 thumb_size）设置完成后再开始加载
+        thumb_source = kwargs.pop('thumb_source', "")
+        super().__init__(**kwargs)
+        self.thumb_source = thumb_source
+        if not thumb_source:
+            self._load()
+
+    def on_thumb_source(self, instance, value):
+        self._load()
+
+    def _load(self):
+        source = self.thumb_source
+        cache = get_thumbnail_cache()
+        self.texture = cache.placeholder()
+
+        def on_ready(texture):
+            # 组件被复用后来源已改变时丢弃过期的结果
+            if self.thumb_source == source:
+                self.texture = texture
+
+        cache.request_texture(source, int(self.thumb_size), on_ready)
@@ -15,10 +15,14 @@ from kivymd.uix.menu import MDDropdownMenu
 from kivymd.uix.chip import MDChip
 from kivymd.uix.floatlayout import MDFloatLayout
 from kivymd.uix.snackbar import MDSnackbar
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
 from kivy.metrics import dp, sp
 import json
 
 from .components.models import ProductCategory
+from .components.money import from_cents
 from .assets.config_chinese import CHINESE_FONT_NAME
 
 
@@ -189,15 +193,190 @@ class StatsTab(MDFloatLayout, MDTabsBase):
             inventory_screen.show_add_category_dialog()
 
     def update_stats(self, products):
-        """更新统计信息"""
-        total_products = len(products)
-        total_stock = sum(p.stock for p in products)
-        total_value = sum(p.price * p.stock for p in products)
+        """更新统计信息（记录每个商品的库存和货值，之后单个商品变化时按差值更新）"""
+        self._contributions = {p.id: (p.stock, p.price_cents * p.stock) for p in products}
+        self._total_stock = sum(stock for stock, _ in self._contributions.values())
+        self._total_value = sum(value for _, value in self._contributions.values())
+        self._show_stats()
+
+    def update_product(self, product):
+        """某个商品的库存或价格变化后，按差值更新统计"""
+        if not hasattr(self, '_contributions'):
+            return
+        old_stock, old_value = self._contributions.get(product.id, (0, 0))
+        stock, value = product.stock, product.price_cents * product.stock
+        self._contributions[product.id] = (stock, value)
+        self._total_stock += stock - old_stock
+        self._total_value += value - old_value
+        self._show_stats()
+
+    def _show_stats(self):
+        self.total_products_label.text = str(len(self._contributions))
+        self.total_stock_label.text = str(self._total_stock)
+        self.total_value_label.text = f"¥{from_cents(self._total_value):.1f}"
+
+
+class InventoryProductItem(RecycleDataViewBehavior, MDCard):
+    """库存商品行（ProductsTab 中 RecycleView 的复用视图）"""
+    product_id = StringProperty()
+    name = StringProperty()
+    price = NumericProperty()
+    category = StringProperty()
+    stock = NumericProperty()
+    description = StringProperty()
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.orientation = 'vertical'
+        self.size_hint = (1, None)
+        self.height = dp(180)
+        self.padding = dp(15)
+        self.spacing = dp(10)
+        self.elevation = dp(2)
+        self.radius = [dp(15)]
+        self.ripple_behavior = True
+
+        # 商品信息
+        info_layout = MDBoxLayout(
+            orientation='vertical',
+            size_hint=(1, 0.7)
+        )
+
+        # 名称和价格
+        name_price_layout = MDBoxLayout(
+            orientation='horizontal',
+            size_hint=(1, None),
+            height=dp(30)
+        )
+
+        self.name_label = MDLabel(
+            text=self.name,
+            theme_text_color="Primary",
+            font_style="Headline6",
+            size_hint=(0.7, 1)
+        )
+
+        self.price_label = MDLabel(
+            text=f"¥{self.price:.1f}",
+            theme_text_color="Error",
+            size_hint=(0.3, 1),
+            halign="right"
+        )
+
+        name_price_layout.add_widget(self.name_label)
+        name_price_layout.add_widget(self.price_label)
+
+        # 分类和库存
+        category_stock_layout = MDBoxLayout(
+            orientation='horizontal',
+            size_hint=(1, None),
+            height=dp(25)
+        )
+
+        # 分类标签
+        self.category_label = MDLabel(
+            text=self.category,
+            theme_text_color="Secondary",
+            size_hint=(0.5, 1),
+            halign="left"
+        )
+
+        self.stock_label = MDLabel(
+            text=f"库存：{self.stock}",
+            theme_text_color="Secondary",
+            size_hint=(0.5, 1),
+            halign="right"
+        )
+
+        category_stock_layout.add_widget(self.category_label)
+        category_stock_layout.add_widget(self.stock_label)
+
+        # 描述
+        self.desc_label = MDLabel(
+            text=self._short_description(self.description),
+            theme_text_color="Hint",
+            font_style="Caption",
+            size_hint_y=None,
+            height=dp(40)
+        )
 
-        self.total_products_label.text = str(total_products)
-        self.total_stock_label.text = str(total_stock)
-        self.total_value_label.text = f"¥{total_value:.1f}"
+        info_layout.add_widget(name_price_layout)
+        info_layout.add_widget(category_stock_layout)
+        info_layout.add_widget(self.desc_label)
 
+        # 操作按钮
+        actions_layout = MDBoxLayout(
+            orientation='horizontal',
+            size_hint=(1, None),
+            height=dp(40),
+            spacing=dp(10)
+        )
+
+        # 调整库存按钮
+        adjust_btn = MDRaisedButton(
+            text="调整库存",
+            size_hint=(0.33, 1),
+            md_bg_color=(0.2, 0.8, 0.6, 1)
+        )
+        adjust_btn.bind(on_release=lambda x: self.dispatch_action("adjust_stock"))
+
+        # 编辑按钮
+        edit_btn = MDRaisedButton(
+            text="编辑",
+            size_hint=(0.33, 1),
+            md_bg_color=(0.2, 0.4, 0.2, 1)
+        )
+        edit_btn.bind(on_release=lambda x: self.dispatch_action("edit_product"))
+
+        # 删除按钮
+        delete_btn = MDRaisedButton(
+            text="删除",
+            # theme_text_color="Error",
+            size_hint=(0.33, 1),
+            md_bg_color=(0.6, 0.4, 0.6, 1)
+        )
+        delete_btn.bind(on_release=lambda x: self.dispatch_action("delete_product"))
+
+        actions_layout.add_widget(adjust_btn)
+        actions_layout.add_widget(edit_btn)
+        actions_layout.add_widget(delete_btn)
+
+        self.add_widget(info_layout)
+        self.add_widget(actions_layout)
+
+    @staticmethod
+    def _short_description(description):
+        return description[:50] + "..." if len(description) > 50 else description
+
+    # 复用时由 RecycleView 设置新的属性值，同步更新子控件
+    def on_name(self, instance, value):
+        if hasattr(self, 'name_label'):
+            self.name_label.text = value
+
+    def on_price(self, instance, value):
+        if hasattr(self, 'price_label'):
+            self.price_label.text = f"¥{value:.1f}"
+
+    def on_category(self, instance, value):
+        if hasattr(self, 'category_label'):
+            self.category_label.text = value
+
+    def on_stock(self, instance, value):
+        if hasattr(self, 'stock_label'):
+            self.stock_label.text = f"库存：{value}"
+
+    def on_description(self, instance, value):
+        if hasattr(self, 'desc_label'):
+            self.desc_label.text = self._short_description(value)
+
+    def dispatch_action(self, action):
+        """按当前绑定的商品 id 取出商品，交给 ProductsTab 处理"""
+        from kivy.app import App
+        app = App.get_running_app()
+        product = app.db.get_product(self.product_id)
+        inventory_screen = app.root.get_screen("inventory")
+        if product and inventory_screen and inventory_screen.products_tab:
+            getattr(inventory_screen.products_tab, action)(product)
 
 class ProductsTab(MDFloatLayout, MDTabsBase):
     """商品管理标签页"""
@@ -241,15 +420,34 @@ class ProductsTab(MDFloatLayout, MDTabsBase):
         filter_card.add_widget(self.search_input)
         filter_card.add_widget(self.category_filter_btn)
 
-        # 商品列表
-        self.product_scroll = MDScrollView()
-        self.product_list = MDList()
-        self.product_scroll.add_widget(self.product_list)
+        # 商品列表（复用视图，只创建可视区域内的行）
+        self.product_rv = RecycleView()
+        self.product_rv.viewclass = InventoryProductItem
+        rv_layout = RecycleBoxLayout(
+            orientation='vertical',
+            default_size=(None, dp(180)),
+            default_size_hint=(1, None),
+            size_hint_y=None,
+            spacing=dp(5)
+        )
+        rv_layout.bind(minimum_height=rv_layout.setter('height'))
+        self.product_rv.add_widget(rv_layout)
+        self._row_index = {}
+
+        self.empty_label = MDLabel(
+            text="暂无商品",
+            halign="center",
+            theme_text_color="Hint",
+            font_style="H5",
+            pos_hint={"center_x": 0.5, "center_y": 0.5},
+            opacity=0
+        )
 
         layout.add_widget(filter_card)
-        layout.add_widget(self.product_scroll)
+        layout.add_widget(self.product_rv)
 
         self.add_widget(layout)
+        self.add_widget(self.empty_label)
 
     def show_category_menu(self, *args):
         """显示分类菜单"""
@@ -261,149 +459,60 @@ class ProductsTab(MDFloatLayout, MDTabsBase):
 
     def load_products(self, products, category_filter=None):
         """加载商品"""
-        self.product_list.clear_widgets()
-
-        # 应用分类筛选
-        if category_filter and category_filter != "全部":
-            products = [p for p in products if p.category == category_filter]
+        from kivy.app import App
+        app = App.get_running_app()
 
-        # 应用搜索筛选
-        search_text = self.search_input.text.strip().lower()
+        # 应用搜索和分类筛选（通过搜索索引和分类索引查询）
+        category = category_filter if category_filter and category_filter != "全部" else None
+        search_text = self.search_input.text.strip()
+        self._filter = (category, search_text.lower())
         if search_text:
-            products = [p for p in products if search_text in p.name.lower() or search_text in p.description.lower()]
-
-        if not products:
-            empty_label = MDLabel(
-                text="暂无商品",
-                halign="center",
-                theme_text_color="Hint",
-                font_style="H5"
-            )
-            self.product_list.add_widget(empty_label)
-            return
-
-        for product in products:
-            # 创建商品卡片
-            product_card = MDCard(
-                orientation='vertical',
-                size_hint=(1, None),
-                height=dp(180),
-                padding=dp(15),
-                spacing=dp(10),
-                elevation=dp(2),
-                radius=[dp(15)],
-                ripple_behavior=True
-            )
-
-            # 商品信息
-            info_layout = MDBoxLayout(
-                orientation='vertical',
-                size_hint=(1, 0.7)
-            )
-
-            # 名称和价格
-            name_price_layout = MDBoxLayout(
-                orientation='horizontal',
-                size_hint=(1, None),
-                height=dp(30)
-            )
-
-            name_label = MDLabel(
-                text=product.name,
-                theme_text_color="Primary",
-                font_style="Headline6",
-                size_hint=(0.7, 1)
-            )
-
-            price_label = MDLabel(
-                text=f"¥{product.price:.1f}",
-                theme_text_color="Error",
-                size_hint=(0.3, 1),
-                halign="right"
-            )
-
-            name_price_layout.add_widget(name_label)
-            name_price_layout.add_widget(price_label)
-
-            # 分类和库存
-            category_stock_layout = MDBoxLayout(
-                orientation='horizontal',
-                size_hint=(1, None),
-                height=dp(25)
-            )
-
-            # 分类标签
-            category_label = MDLabel(
-                text=product.category,
-                theme_text_color="Secondary",
-                size_hint=(0.5, 1),
-                halign="left"
-            )
-
-            stock_label = MDLabel(
-                text=f"库存：{product.stock}",
-                theme_text_color="Secondary",
-                size_hint=(0.5, 1),
-                halign="right"
-            )
-
-            category_stock_layout.add_widget(category_label)
-            category_stock_layout.add_widget(stock_label)
-
-            # 描述
-            desc_label = MDLabel(
-                text=product.description[:50] + "..." if len(product.description) > 50 else product.description,
-                theme_text_color="Hint",
-                font_style="Caption",
-                size_hint_y=None,
-                height=dp(40)
-            )
-
-            info_layout.add_widget(name_price_layout)
-            info_layout.add_widget(category_stock_layout)
-            info_layout.add_widget(desc_label)
-
-            # 操作按钮
-            actions_layout = MDBoxLayout(
-                orientation='horizontal',
-                size_hint=(1, None),
-                height=dp(40),
-                spacing=dp(10)
-            )
-
-            # 调整库存按钮
-            adjust_btn = MDRaisedButton(
-                text="调整库存",
-                size_hint=(0.33, 1),
-                md_bg_color=(0.2, 0.8, 0.6, 1)
-            )
-            adjust_btn.bind(on_release=lambda x, p=product: self.adjust_stock(p))
-
-            # 编辑按钮
-            edit_btn = MDRaisedButton(
-                text="编辑",
-                size_hint=(0.33, 1),
-                md_bg_color=(0.2, 0.4, 0.2, 1)
-            )
-            edit_btn.bind(on_release=lambda x, p=product: self.edit_product(p))
-
-            # 删除按钮
-            delete_btn = MDRaisedButton(
-                text="删除",
-                # theme_text_color="Error",
-                size_hint=(0.33, 1),
-                md_bg_color=(0.6, 0.4, 0.6, 1)
-            )
-            delete_btn.bind(on_release=lambda x, p=product: self.delete_product(p))
-
-            actions_layout.add_widget(adjust_btn)
-            actions_layout.add_widget(edit_btn)
-            actions_layout.add_widget(delete_btn)
-
-            product_card.add_widget(info_layout)
-            product_card.add_widget(actions_layout)
+            products = app.db.search_products(search_text, category=category)
+        elif category:
+            products = app.db.get_products(category=category)
+
+        self.empty_label.opacity = 0 if products else 1
+        self.product_rv.data = [self._row_data(product) for product in products]
+        self._row_index = {product.id: i for i, product in enumerate(products)}
+        self.product_rv.scroll_y = 1
+
+    @staticmethod
+    def _row_data(product):
+        """商品行数据"""
+        return {
+            'product_id': product.id,
+            'name': product.name,
+            'price': product.price,
+            'category': product.category.value if isinstance(product.category, ProductCategory) else product.category,
+            'stock': product.stock,
+            'description': product.description,
+        }
 
-            self.product_list.add_widget(product_card)
+    def _matches(self, product):
+        """商品是否仍满足当前的分类和搜索条件（与 Database.search_products 的匹配规则一致）"""
+        category, search_text = getattr(self, '_filter', (None, ""))
+        category_name = product.category.value if isinstance(product.category, ProductCategory) else str(product.category)
+        if category and category_name != category:
+            return False
+        return (not search_text or search_text in str(product.name).lower()
+                or search_text in str(product.description).lower() or search_text in category_name.lower())
+
+    def update_product(self, product):
+        """只更新某个商品对应的行，修改后不再满足筛选条件时移除该行；商品不在当前列表中时忽略"""
+        index = self._row_index.get(product.id)
+        if index is None:
+            return False
+        if self._matches(product):
+            self.product_rv.data[index] = self._row_data(product)
+            return True
+
+        del self.product_rv.data[index]
+        del self._row_index[product.id]
+        for product_id, i in self._row_index.items():
+            if i > index:
+                self._row_index[product_id] = i - 1
+        self.empty_label.opacity = 0 if self.product_rv.data else 1
+        return True
 
     def adjust_stock(self, product):
         """调整库存"""
@@ -488,8 +597,14 @@ class CategoriesTab(MDFloatLayout, MDTabsBase):
         if inventory_screen:
             inventory_screen.show_add_category_dialog()
 
-    def load_categories(self, categories, products):
-        """加载分类"""
+    def load_categories(self, categories, counts):
+        """
+        加载分类
+
+        Args:
+            categories: 分类列表
+            counts: 分类名称 -> 商品数量
+        """
         self.category_list.clear_widgets()
 
         if not categories:
@@ -503,12 +618,9 @@ class CategoriesTab(MDFloatLayout, MDTabsBase):
             return
 
         for category in categories:
-            # 统计该分类下的商品数量
-            category_products = [p for p in products if p.category == category.name]
-
             item = TwoLineAvatarIconListItem(
                 text=category.name,
-                secondary_text=f"{len(category_products)} 个商品",
+                secondary_text=f"{counts.get(category.name, 0)} 个商品",
                 _txt_left_pad=dp(20)
             )
 
@@ -634,12 +746,27 @@ class InventoryScreen(Screen):
 
         # 更新分类管理标签页
         if self.categories_tab:
-            self.categories_tab.load_categories(categories, products)
+            self.categories_tab.load_categories(categories, app.db.count_by_category())
 
         # 设置分类菜单
         self.setup_category_menu()
         MDSnackbar(MDLabel(text="库存数据已刷新", text_color=(0.2, 0.8, 0.2, 1))).open()
 
+    def refresh_product(self, product_id):
+        """商品修改后只更新对应的行和统计，不重建整个列表"""
+        from kivy.app import App
+        app = App.get_running_app()
+
+        product = app.db.get_product(product_id)
+        if not product:
+            self.refresh_inventory()
+            return
+
+        if self.stats_tab:
+            self.stats_tab.update_product(product)
+        if self.products_tab:
+            self.products_tab.update_product(product)
+
     def setup_category_menu(self):
         """设置分类菜单"""
         from kivy.app import App
@@ -1107,8 +1234,8 @@ class InventoryScreen(Screen):
         if app.inventory_manager.update_product_stock(product.id, new_stock):
             dialog.dismiss()
 
-            # 刷新数据
-            self.refresh_inventory()
+            # 只刷新受影响的商品行和统计
+            self.refresh_product(product.id)
             MDSnackbar(MDLabel(text="库存更新成功", text_color=(0.2, 0.8, 0.2, 1))).open()
         else:
             MDSnackbar(MDLabel(text="库存更新失败", text_color=(0.9, 0.2, 0.2, 1))).open()
@@ -1230,8 +1357,10 @@ class InventoryScreen(Screen):
         if app.inventory_manager.update_product_info(product):
             dialog.dismiss()
 
-            # 刷新数据
-            self.refresh_inventory()
+            # 只刷新受影响的商品行、统计和分类计数
+            self.refresh_product(product.id)
+            if self.categories_tab:
+                self.categories_tab.load_categories(app.inventory_manager.get_categories(), app.db.count_by_category())
             MDSnackbar(MDLabel(text="库存更新成功", text_color=(0.2, 0.8, 0.2, 1))).open()
         else:
             MDSnackbar(MDLabel(text="库存更新失败", text_color=(0.9, 0.2, 0.2, 1))).open()
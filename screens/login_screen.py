@@ -7,55 +7,162 @@ from kivymd.uix.dialog import MDDialog
 from kivymd.uix.button import MDFlatButton
 from kivymd.uix.snackbar import MDSnackbar
 from kivy.metrics import dp, sp
+from kivy.clock import Clock
+from kivy.logger import Logger
 
+import hashlib
+import hmac
 import json
 import re
 import os
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
 from .assets.config_chinese import CHINESE_FONT_NAME
+from .components.storage import Storage, JsonStorage
 
 
 class UserManager:
-    """用户管理类，处理用户注册、登录和数据的JSON存储"""
+    """用户管理类，处理用户注册、登录和数据的JSON存储
 
-    def __init__(self, data_file: str = "/data/users.json"):
+    用户按手机号和用户名建立索引；密码以加盐的 PBKDF2-SHA256 哈希保存，
+    格式为 "pbkdf2_sha256$迭代次数$盐$哈希"，旧数据中的明文密码在登录成功时自动转换。
+    """
+
+    FLUSH_DELAY = 5.0  # 登录时间等易变字段延迟写入的秒数
+    PASSWORD_SCHEME = "pbkdf2_sha256"
+    PASSWORD_ITERATIONS = 200_000  # 哈希计算成本，可通过构造参数调整
+    VERIFY_CACHE_SIZE = 1024
+
+    def __init__(self, data_file: str = "/data/users.json", storage: Optional[Storage] = None,
+                 iterations: Optional[int] = None):
         """
         初始化用户管理器
 
         Args:
             data_file: 用户数据JSON文件路径
+            storage: 存储后端，默认使用 data_file 对应的JSON文件
+            iterations: 密码哈希迭代次数，默认 PASSWORD_ITERATIONS
         """
         self.data_file = str(Path(__file__).parent.parent) + data_file
+        self.storage = storage or JsonStorage({'users': self.data_file})
+        self.iterations = iterations or self.PASSWORD_ITERATIONS
         self.users = self._load_users()
-
-    def _ensure_data_dir(self):
-        """确保数据目录存在"""
-        data_dir = os.path.dirname(self.data_file)
-        if data_dir and not os.path.exists(data_dir):
-            os.makedirs(data_dir)
+        self._by_phone: Dict[str, Dict] = {}
+        self._by_name: Dict[str, Dict] = {}
+        for user in self.users:
+            self._index_user(user)
+        # 最近验证成功的 (哈希, 密码) 摘要，避免重复计算哈希
+        self._verified = OrderedDict()
+        # 只修改了易变字段（最后登录时间）、尚未写入的用户手机号
+        self._dirty = set()
+        self._flush_trigger = Clock.create_trigger(self._flush_later, self.FLUSH_DELAY)
 
     def _load_users(self) -> List[Dict]:
-        """从JSON文件加载用户数据"""
-        self._ensure_data_dir()
-
-        if not os.path.exists(self.data_file):
-            return []
-
+        """加载用户数据"""
         try:
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return self.storage.load('users')
         except (json.JSONDecodeError, FileNotFoundError):
             return []
 
+    def _index_user(self, user: Dict):
+        self._by_phone[user["phone"]] = user
+        self._by_name[user["username"]] = user
+
+    def get_user(self, phone: str) -> Optional[Dict]:
+        """按手机号查找用户"""
+        return self._by_phone.get(phone)
+
+    def get_user_by_name(self, username: str) -> Optional[Dict]:
+        """按用户名查找用户"""
+        return self._by_name.get(username)
+
+    def change_phone(self, user: Dict, phone: str) -> bool:
+        """修改用户手机号（手机号已被其他用户使用时返回 False）"""
+        other = self._by_phone.get(phone)
+        if other is not None and other is not user:
+            return False
+        self._by_phone.pop(user["phone"], None)
+        user["phone"] = phone
+        self._by_phone[phone] = user
+        return True
+
+    def hash_password(self, password: str, salt: Optional[bytes] = None) -> str:
+        """计算密码哈希"""
+        salt = salt or os.urandom(16)
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, self.iterations)
+        return f"{self.PASSWORD_SCHEME}${self.iterations}${salt.hex()}${digest.hex()}"
+
+    def verify_password(self, user: Dict, password: str) -> bool:
+        """验证密码；明文或迭代次数过期的旧密码验证成功后重新哈希保存"""
+        stored = user.get("password") or ""
+        cache_key = hashlib.sha256(f"{stored}\0{password}".encode("utf-8")).digest()
+        if cache_key in self._verified:
+            self._verified.move_to_end(cache_key)
+            return True
+
+        parts = stored.split("$")
+        if len(parts) == 4 and parts[0] == self.PASSWORD_SCHEME:
+            iterations, salt, expected = int(parts[1]), bytes.fromhex(parts[2]), bytes.fromhex(parts[3])
+            digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+            if not hmac.compare_digest(digest, expected):
+                return False
+            if iterations != self.iterations:
+                self.set_password(user, password)
+                return True
+        else:
+            # 旧数据中的明文密码
+            if not hmac.compare_digest(stored.encode("utf-8"), password.encode("utf-8")):
+                return False
+            self.set_password(user, password)
+            return True
+
+        self._verified[cache_key] = None
+        if len(self._verified) > self.VERIFY_CACHE_SIZE:
+            self._verified.popitem(last=False)
+        return True
+
+    def set_password(self, user: Dict, password: str):
+        """设置新密码并立即保存"""
+        user["password"] = self.hash_password(password)
+        self.save_user(user)
+
     def save_users(self):
-        """保存用户数据到JSON文件"""
-        self._ensure_data_dir()
-        print(f"data_file: {self.data_file}")
-        with open(self.data_file, 'w', encoding='utf-8') as f:
-            json.dump(self.users, f, ensure_ascii=False, indent=2)
+        """保存全部用户数据"""
+        self.storage.save('users', self.users)
+        self._dirty.clear()
+
+    def save_user(self, user: Dict):
+        """保存单个用户（后端不支持单行写入时整表保存）"""
+        if self.storage.supports_row_writes('users'):
+            self.storage.upsert('users', [user])
+        else:
+            self.save_users()
+
+    def touch_login(self, user: Dict):
+        """更新最后登录时间，延迟批量写入（应用退出时也会写入）"""
+        user["last_login_time"] = self._get_current_time()
+        self._dirty.add(user["phone"])
+        self._flush_trigger()
+
+    def flush(self):
+        """写入延迟保存的用户"""
+        if not self._dirty:
+            return
+        if self.storage.supports_row_writes('users'):
+            users = [self._by_phone[phone] for phone in self._dirty if phone in self._by_phone]
+            self.storage.upsert('users', users)
+            self._dirty.clear()
+        else:
+            self.save_users()
+
+    def _flush_later(self, dt):
+        try:
+            self.flush()
+        except Exception as e:
+            Logger.warning(f"保存用户登录时间失败: {e}")
 
     def _get_current_time(self) -> str:
         """获取当前时间的格式化字符串"""
@@ -78,11 +185,11 @@ class UserManager:
             return False, "所有字段都必须填写"
 
         # 检查用户名是否已存在
-        if any(user["username"] == username for user in self.users):
+        if username in self._by_name:
             return False, "用户名已存在"
 
         # 检查手机号是否已存在
-        if any(user["phone"] == phone for user in self.users):
+        if phone in self._by_phone:
             return False, "手机号已注册"
 
         # 验证手机号格式（简单验证）
@@ -93,7 +200,7 @@ class UserManager:
         new_user = {
             "username": username,
             "phone": phone,
-            "password": password,
+            "password": self.hash_password(password),
             "email": None,
             "usual_address": [],
             "register_time": self._get_current_time(),
@@ -102,7 +209,8 @@ class UserManager:
 
         # 添加到用户列表并保存
         self.users.append(new_user)
-        self.save_users()
+        self._index_user(new_user)
+        self.save_user(new_user)
 
         return True, "注册成功！"
 
@@ -118,34 +226,25 @@ class UserManager:
             (是否成功, 提示信息, 用户信息)
         """
         # 查找用户
-        user = None
-        for u in self.users:
-            if u["phone"] == phone:
-                user = u
-                break
+        user = self.get_user(phone)
 
         # 检查用户是否存在
         if not user:
             return False, "用户不存在", None
 
         # 验证密码
-        if user["password"] != password:
+        if not self.verify_password(user, password):
             return False, "密码错误", None
 
         # 更新最后登录时间
-        user["last_login_time"] = self._get_current_time()
-        self.save_users()
+        self.touch_login(user)
 
         return True, f"欢迎回来，{user['username']}！", user
 
     def demo_login(self) -> Tuple[bool, str, Optional[Dict]]:
         """演示登录（使用默认账户）"""
         # 检查是否有演示账户
-        demo_user = None
-        for user in self.users:
-            if user["username"] == "demo" or user["phone"] == "13800138000":
-                demo_user = user
-                break
+        demo_user = self.get_user_by_name("demo") or self.get_user("13800138000")
 
         # 如果没有演示账户，创建一个
         if not demo_user:
@@ -156,15 +255,11 @@ class UserManager:
             )
             if success:
                 # 重新获取用户信息
-                for user in self.users:
-                    if user["phone"] == "13800138000":
-                        demo_user = user
-                        break
+                demo_user = self.get_user("13800138000")
 
         if demo_user:
             # 更新最后登录时间
-            demo_user["last_login_time"] = self._get_current_time()
-            self.save_users()
+            self.touch_login(demo_user)
             return True, f"演示登录成功！欢迎{demo_user['username']}", demo_user
 
         return False, "演示登录失败", None
@@ -12,12 +12,15 @@ from kivymd.uix.menu import MDDropdownMenu
 from kivymd.uix.toolbar import MDTopAppBar
 from kivymd.uix.chip import MDChip
 from kivymd.uix.snackbar import MDSnackbar
+from kivymd.uix.progressbar import MDProgressBar
 from kivy.metrics import dp, sp
 from kivymd.app import MDApp
 from kivy.lang import Builder
 from kivy.utils import platform
 from plyer import filechooser
 from kivy.clock import Clock
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
 
 import json
 import os
@@ -27,16 +30,75 @@ from kivymd.uix.filemanager import MDFileManager
 from kivymd.uix.textfield import MDTextField
 from kivymd.toast import toast
 
-import csv
 from datetime import datetime
-from io import StringIO
 
 from .assets.config_chinese import CHINESE_FONT_NAME
+from .components.money import from_cents
+from .components.export import OrderExporter, EXPORT_DIR, write_orders
+
+
+def format_order_time(created_at: str, with_year: bool = True) -> str:
+    """订单时间显示为 "YYYY-MM-DD HH:MM"（或 "MM-DD HH:MM"），直接截取字符串不做日期解析"""
+    text = created_at[:16].replace("T", " ")
+    return text if with_year else text[5:]
+
+
+class OrderPageList(RecycleView):
+    """分页加载订单的复用列表：只创建可视区域内的行，滚动接近底部时再取下一页
+
+    fetch_page(cursor, limit) 返回 (订单列表, 下一页游标)，make_item(order) 返回一行的数据字典。
+    """
+    ROW_HEIGHT = dp(88)
+
+    def __init__(self, fetch_page, make_item, viewclass="ThreeLineListItem", page_size=30, **kwargs):
+        super().__init__(**kwargs)
+        self.viewclass = viewclass
+        self.page_size = page_size
+        layout = RecycleBoxLayout(
+            orientation='vertical',
+            default_size=(None, self.ROW_HEIGHT),
+            default_size_hint=(1, None),
+            size_hint_y=None
+        )
+        layout.bind(minimum_height=layout.setter('height'))
+        self.add_widget(layout)
+        self.bind(scroll_y=self._on_scroll)
+        self.set_source(fetch_page, make_item)
+
+    def set_source(self, fetch_page, make_item=None):
+        """更换数据来源并从第一页重新加载"""
+        self.fetch_page = fetch_page
+        self.make_item = make_item or self.make_item
+        self._cursor = None
+        self._done = False
+        self.data = []
+        self.scroll_y = 1
+        self.load_more()
+
+    def load_more(self):
+        """加载下一页，并保持当前可见位置不变"""
+        if self._done:
+            return
+        orders, self._cursor = self.fetch_page(self._cursor, self.page_size)
+        self._done = self._cursor is None
+        if not orders:
+            return
+
+        offset = (1 - self.scroll_y) * max(len(self.data) * self.ROW_HEIGHT - self.height, 0)
+        self.data.extend(self.make_item(order) for order in orders)
+        scrollable = len(self.data) * self.ROW_HEIGHT - self.height
+        if scrollable > 0:
+            self.scroll_y = max(0, 1 - offset / scrollable)
+
+    def _on_scroll(self, instance, value):
+        if value <= 0.1 and not self._done:
+            self.load_more()
 
 
 class OrdersScreen(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        self.export_cancel = None  # 正在进行的导出的取消标志
         self.name = "orders"
         self._build_ui()
 
@@ -133,8 +195,8 @@ class OrdersScreen(Screen):
             MDSnackbar(MDLabel(text="请先登录", text_color=(0.9, 0.2, 0.2, 1))).open()
             return
 
-        # 获取当前用户的订单
-        orders = app.order_manager.get_orders_by_user(app.current_user['phone'])
+        # 当前用户是否有订单
+        orders, _ = app.order_manager.get_orders_page(limit=1, user_phone=app.current_user['phone'])
 
         if not orders:
             dialog = MDDialog(
@@ -173,29 +235,18 @@ class OrdersScreen(Screen):
             size_hint=(0.2, 1),
             md_bg_color=(0.1, 0.5, 0.2, 0.8)
         )
-        search_btn.bind(on_release=lambda x, o=orders: self.search_orders(o))
+        search_btn.bind(on_release=lambda x: self.search_orders())
 
         search_layout.add_widget(self.search_input)
         search_layout.add_widget(search_btn)
 
-        # 创建订单列表对话框
-        scroll_view = MDScrollView()
-        self.my_orders_list = MDList()
-
-        for order in orders[::-1]:  # 最新的下单 显示在最前
-            time_str = datetime.fromisoformat(order.created_at).strftime("%Y-%m-%d %H:%M")
-            item = ThreeLineAvatarIconListItem(
-                text=f"订单号：{order.order_id[:20]}",
-                secondary_text=f"收货人：{order.address}",  # | 状态：{self.get_status_text(order.status)}",
-                tertiary_text=f"金额：¥{order.total:.1f} | 时间：{time_str}",
-                _txt_left_pad=dp(10),  # 删除icon空白
-                font_style='Caption',
-                secondary_font_style='Overline',
-                tertiary_font_style='Overline'
-            )
-            item.bind(on_release=lambda x, o=order: self.show_order_detail(o))
-            self.my_orders_list.add_widget(item)
-        scroll_view.add_widget(self.my_orders_list)
+        # 创建订单列表对话框（最新的下单显示在最前，滚动时分页加载）
+        phone = app.current_user['phone']
+        self.my_orders_list = OrderPageList(
+            lambda cursor, limit: app.order_manager.get_orders_page(cursor, limit, user_phone=phone),
+            self._my_order_item,
+            viewclass="ThreeLineAvatarIconListItem"
+        )
 
         self.my_order_dialog = MDDialog(
             title="我的订单",
@@ -217,50 +268,63 @@ class OrdersScreen(Screen):
         )
         self.my_order_dialog.ids.title.font_name = CHINESE_FONT_NAME
 
-        # 添加筛选选项
+        # 添加筛选选项（横向滚动）
+        filter_scroll = MDScrollView(do_scroll_y=False, size_hint=(1, None), height=dp(50))
         filter_layout = MDBoxLayout(
             orientation='horizontal',
-            size_hint=(1, None),
+            size_hint=(None, None),
             height=dp(50),
             spacing=dp(10)
         )
+        filter_layout.bind(minimum_width=filter_layout.setter('width'))
 
-        statuses = ["全部", "待付款", "待发货", "待收货", "已完成"]
-        for status in statuses:
+        self.order_status_filter = None
+        statuses = [("全部", None), ("待付款", "pending"), ("待发货", "paid"), ("待收货", "shipped"), ("已完成", "delivered")]
+        for text, status in statuses:
             chip = MDChip(
-                text=status,
+                text=text,
                 size_hint=(None, None),
                 size=(sp(80), sp(30))
             )
+            chip.bind(on_release=lambda x, s=status: self.filter_orders_by_status(s))
             filter_layout.add_widget(chip)
 
-        # self.my_order_dialog.content_cls.add_widget(filter_layout)
+        filter_scroll.add_widget(filter_layout)
+        self.my_order_dialog.content_cls.add_widget(filter_scroll)
         self.my_order_dialog.content_cls.add_widget(search_layout)
-        self.my_order_dialog.content_cls.add_widget(scroll_view)
+        self.my_order_dialog.content_cls.add_widget(self.my_orders_list)
         self.my_order_dialog.open()
 
-    def search_orders(self, orders):
-        self.my_orders_list.clear_widgets()
-        search_text = self.search_input.text.strip().lower()
+    def _my_order_item(self, order):
+        """我的订单列表中一行的数据"""
+        return {
+            'text': f"订单号：{order.order_id[:20]}",
+            'secondary_text': f"收货人：{order.address}",  # | 状态：{self.get_status_text(order.status)}",
+            'tertiary_text': f"金额：¥{order.total:.1f} | 时间：{format_order_time(order.created_at)}",
+            '_txt_left_pad': dp(10),  # 删除icon空白
+            'font_style': 'Caption',
+            'secondary_font_style': 'Overline',
+            'tertiary_font_style': 'Overline',
+            'on_release': lambda o=order: self.show_order_detail(o),
+        }
 
-        filtered_orders = [
-            p for p in orders
-            if search_text in str(p.address).lower() or search_text in str(p.order_id[:20]).lower()
-        ]
+    def search_orders(self):
+        """按订单号前缀、收货地址、商品名称和当前选择的状态查询订单（通过索引，只加载第一页）"""
+        from kivy.app import App
+        app = App.get_running_app()
 
-        for order in filtered_orders[::-1]:  # 最新的下单 显示在最前
-            time_str = datetime.fromisoformat(order.created_at).strftime("%Y-%m-%d %H:%M")
-            item = ThreeLineAvatarIconListItem(
-                text=f"订单号：{order.order_id[:20]}",
-                secondary_text=f"收货人：{order.address}",  # | 状态：{self.get_status_text(order.status)}",
-                tertiary_text=f"金额：¥{order.total:.1f} | 时间：{time_str}",
-                _txt_left_pad=dp(10),  # 删除icon空白
-                font_style='Caption',
-                secondary_font_style='Overline',
-                tertiary_font_style='Overline'
-            )
-            item.bind(on_release=lambda x, o=order: self.show_order_detail(o))
-            self.my_orders_list.add_widget(item)  # 重新填充列表
+        query = app.order_manager.query_orders(
+            user_phone=app.current_user['phone'],
+            status=getattr(self, 'order_status_filter', None),
+            text=self.search_input.text
+        )
+        # 最新的下单 显示在最前，重新填充列表
+        self.my_orders_list.set_source(query.page)
+
+    def filter_orders_by_status(self, status):
+        """状态筛选（None 为全部），与搜索框的条件一起查询"""
+        self.order_status_filter = status
+        self.search_orders()
 
     def show_history_orders(self, *args):
         """显示历史订单"""
@@ -271,10 +335,10 @@ class OrdersScreen(Screen):
             MDSnackbar(MDLabel(text="请先登录", theme_text_color="Custom", text_color=(0.9, 0.2, 0.2, 1))).open()
             return
 
-        # 获取所有订单
-        all_orders = app.order_manager.get_all_orders()
+        # 订单汇总
+        summary = app.order_manager.get_summary()
 
-        if not all_orders:
+        if not summary['count']:
             dialog = MDDialog(
                 title="历史订单",
                 text="暂无历史订单记录",
@@ -290,9 +354,9 @@ class OrdersScreen(Screen):
             return
 
         # 创建订单统计
-        total_orders = len(all_orders)
-        total_amount = sum(order.total for order in all_orders)
-        completed_orders = len([o for o in all_orders if o.status == "delivered"])
+        total_orders = summary['count']
+        total_amount = from_cents(summary['revenue_cents'])
+        completed_orders = summary['status'].get("delivered", 0)
 
         # 创建对话框
         self.history_orders_dialog = MDDialog(
@@ -367,7 +431,7 @@ class OrdersScreen(Screen):
         recent_list = MDList()
 
         # 按时间排序，取最近5个
-        sorted_orders = sorted(all_orders, key=lambda x: x.created_at, reverse=True)[:5]
+        sorted_orders = app.order_manager.get_recent_orders(5)
 
         for order in sorted_orders:
             time_str = datetime.fromisoformat(order.created_at).strftime("%m-%d %H:%M")
@@ -482,18 +546,9 @@ class OrdersScreen(Screen):
             MDSnackbar(MDLabel(text="请先登录", theme_text_color="Custom", text_color=(0.9, 0.2, 0.2, 1))).open()
             return
 
-        all_orders = app.order_manager.get_all_orders()
-        sorted_orders = sorted(all_orders, key=lambda x: x.created_at, reverse=True)
-        monthly_stats = {month: {"count": 0, "amount": 0.0, "id_list": []} for month in range(1, 13)}
-        for order in sorted_orders:
-            time_format = datetime.fromisoformat(order.created_at)  # .strftime("%m-%d %H:%M")
-
-            # 检查年份
-            if str(time_format.year) == self.select_year_label.text:
-                # 更新统计
-                monthly_stats[time_format.month]["count"] += 1
-                monthly_stats[time_format.month]["amount"] += order.total
-                monthly_stats[time_format.month]["id_list"].append(order.order_id)
+        # 按月汇总（由订单管理器增量维护）
+        year = int(self.select_year_label.text)
+        monthly_stats = app.order_manager.get_year_stats(year)
 
         # 创建对话框
         self.statis_orders_dialog = MDDialog(
@@ -517,32 +572,26 @@ class OrdersScreen(Screen):
 
         scroll_view = MDScrollView()
         month_list = MDList()
-        for month in range(1, 13):
-            if monthly_stats[month]['count'] <= 0:
-                continue
+        for month, stats in monthly_stats.items():
             item = ThreeLineListItem(
                 text=f"{month}月",
-                secondary_text=f"订单数：{monthly_stats[month]['count']:>4}",
-                tertiary_text=f"订单金额：{monthly_stats[month]['amount']:.1f}",
+                secondary_text=f"订单数：{stats['count']:>4}",
+                tertiary_text=f"订单金额：{from_cents(stats['revenue_cents']):.1f}",
                 font_style='Subtitle2',
                 secondary_font_style='Subtitle2',
                 tertiary_font_style='Subtitle2'
             )
-            item.bind(
-                on_release=lambda x, m=month, id=monthly_stats[month]['id_list']: self.show_month_order_detail(m, id))
+            item.bind(on_release=lambda x, m=month: self.show_month_order_detail(year, m))
             month_list.add_widget(item)
         scroll_view.add_widget(month_list)
 
         self.statis_orders_dialog.content_cls.add_widget(scroll_view)
         self.statis_orders_dialog.open()
 
-    def show_month_order_detail(self, month, id_list):
+    def show_month_order_detail(self, year, month):
         from kivy.app import App
         app = App.get_running_app()
 
-        all_orders = app.order_manager.get_all_orders()
-        month_orders = [o for o in all_orders if o.order_id in id_list]
-
         # 创建对话框
         month_orders_dialog = MDDialog(
             title=f"{month}月订单明细",
@@ -564,23 +613,20 @@ class OrdersScreen(Screen):
         )
         month_orders_dialog.ids.title.font_name = CHINESE_FONT_NAME
 
-        scroll_view = MDScrollView()
-        recent_list = MDList()
-        for order in month_orders[::-1]:  # 倒序，日期较大的排在前面
-            time_str = datetime.fromisoformat(order.created_at).strftime("%m-%d %H:%M")
-            item = ThreeLineListItem(
-                text=f"订单号：{order.order_id[:20]}",
-                secondary_text=f"收货人：{order.address}",  # | {self.get_status_text(order.status)}"
-                tertiary_text=f"金额：¥{order.total:.1f} | 时间：{time_str}",
-                font_style='Caption',
-                secondary_font_style='Overline',
-                tertiary_font_style='Overline'
-            )
-            item.bind(on_release=lambda x, o=order: self.show_order_detail(o, has_delete=False))
-            recent_list.add_widget(item)
-
-        scroll_view.add_widget(recent_list)
-        month_orders_dialog.content_cls.add_widget(scroll_view)
+        # 倒序，日期较大的排在前面，滚动时分页加载
+        month_list = OrderPageList(
+            lambda cursor, limit: app.order_manager.get_orders_page(cursor, limit, month=(year, month)),
+            lambda order: {
+                'text': f"订单号：{order.order_id[:20]}",
+                'secondary_text': f"收货人：{order.address}",  # | {self.get_status_text(order.status)}"
+                'tertiary_text': f"金额：¥{order.total:.1f} | 时间：{format_order_time(order.created_at, False)}",
+                'font_style': 'Caption',
+                'secondary_font_style': 'Overline',
+                'tertiary_font_style': 'Overline',
+                'on_release': lambda o=order: self.show_order_detail(o, has_delete=False),
+            }
+        )
+        month_orders_dialog.content_cls.add_widget(month_list)
         month_orders_dialog.open()
 
     def show_all_orders(self):
@@ -590,25 +636,20 @@ class OrdersScreen(Screen):
         from kivy.app import App
         app = App.get_running_app()
 
-        all_orders = app.order_manager.get_all_orders()
-
-        scroll_view = MDScrollView()
-        order_list = MDList()
-
-        for order in all_orders[::-1]:
-            time_str = datetime.fromisoformat(order.created_at).strftime("%Y-%m-%d %H:%M")
-            item = ThreeLineListItem(
-                text=f"订单号：{order.order_id[:20]}",
-                secondary_text=f"收货人：{order.address}",  # | 状态：{self.get_status_text(order.status)}"
-                tertiary_text=f"用户：{order.user_name} | 金额：¥{order.total:.1f} | 时间：{time_str}",
-                font_style='Caption',
-                secondary_font_style='Overline',
-                tertiary_font_style='Overline'
-            )
-            item.bind(on_release=lambda x, o=order: self.show_order_detail(o, prev_dialog='all'))
-            order_list.add_widget(item)
-
-        scroll_view.add_widget(order_list)
+        # 最新的订单显示在最前，滚动时分页加载
+        order_list = OrderPageList(
+            lambda cursor, limit: app.order_manager.get_orders_page(cursor, limit),
+            lambda order: {
+                'text': f"订单号：{order.order_id[:20]}",
+                'secondary_text': f"收货人：{order.address}",  # | 状态：{self.get_status_text(order.status)}"
+                'tertiary_text': f"用户：{order.user_name} | 金额：¥{order.total:.1f} | "
+                                 f"时间：{format_order_time(order.created_at)}",
+                'font_style': 'Caption',
+                'secondary_font_style': 'Overline',
+                'tertiary_font_style': 'Overline',
+                'on_release': lambda o=order: self.show_order_detail(o, prev_dialog='all'),
+            }
+        )
 
         self.all_orders_detail_dailog = MDDialog(
             title="所有订单详情",
@@ -628,12 +669,12 @@ class OrdersScreen(Screen):
                 ),
                 MDRaisedButton(
                     text="导出数据",
-                    on_release=lambda x, o=all_orders: self.export_orders_data(o)
+                    on_release=lambda x: self.export_orders_data()
                 )
             ]
         )
         self.all_orders_detail_dailog.ids.title.font_name = CHINESE_FONT_NAME
-        self.all_orders_detail_dailog.content_cls.add_widget(scroll_view)
+        self.all_orders_detail_dailog.content_cls.add_widget(order_list)
         self.all_orders_detail_dailog.open()
 
     def show_order_detail(self, order, has_delete=True, prev_dialog="my"):
@@ -866,14 +907,61 @@ class OrdersScreen(Screen):
         # return status_map.get(status, status)
         return "已完成"
 
-    def export_orders_data(self, orders):
-        """导出订单数据"""
-        # self.all_orders_detail_dailog.dismiss()
+    def export_orders_data(self, fmt="items", start=None, end=None):
+        """在后台导出订单数据（默认每个订单商品一行的 CSV），显示进度，完成后提示文件位置"""
+        from kivy.app import App
+        app = App.get_running_app()
 
-        # JSONToCSVApp().export_json_to_csv(orders)
+        if self.export_cancel is not None:
+            MDSnackbar(MDLabel(text="正在导出，请稍候", text_color=(0.9, 0.2, 0.2, 1))).open()
+            return
 
-        MDSnackbar(
-            MDLabel(text="订单数据导出功能开发中", theme_text_color="Custom", text_color=(0.2, 0.6, 0.86, 1))).open()
+        directory = EXPORT_DIR
+        if platform == 'android':
+            directory = os.path.join(primary_external_storage_path(), "Download")
+
+        progress_label = MDLabel(text="正在导出...", font_name=CHINESE_FONT_NAME, size_hint_y=None, height=dp(30))
+        progress_bar = MDProgressBar(value=0, size_hint_y=None, height=dp(8))
+        content = MDBoxLayout(orientation='vertical', spacing=dp(10), size_hint_y=None, height=dp(60))
+        content.add_widget(progress_label)
+        content.add_widget(progress_bar)
+
+        def cancel(*args):
+            if self.export_cancel is not None:
+                self.export_cancel.set()
+            dialog.dismiss()
+
+        dialog = MDDialog(
+            title="导出订单",
+            type="custom",
+            content_cls=content,
+            auto_dismiss=False,
+            buttons=[MDFlatButton(text="取消", on_release=cancel)]
+        )
+        dialog.ids.title.font_name = CHINESE_FONT_NAME
+        dialog.open()
+
+        def on_progress(done, total):
+            progress_label.text = f"正在导出... {done}/{total}"
+            progress_bar.value = done * 100 / total if total else 100
+
+        def on_done(path):
+            self.export_cancel = None
+            dialog.dismiss()
+            if path:
+                MDSnackbar(MDLabel(text=f"订单已导出到: {path}", theme_text_color="Custom",
+                                   text_color=(0.2, 0.8, 0.2, 1))).open()
+
+        def on_error(error):
+            self.export_cancel = None
+            dialog.dismiss()
+            MDSnackbar(MDLabel(text=f"导出失败: {error}", theme_text_color="Custom",
+                               text_color=(0.9, 0.2, 0.2, 1))).open()
+
+        exporter = OrderExporter(app.order_manager)
+        self.export_cancel = exporter.export_async(
+            exporter.default_path(fmt, directory), fmt, start, end,
+            progress=on_progress, on_done=on_done, on_error=on_error)
 
     def refresh_orders(self):
         """刷新订单"""
@@ -906,39 +994,25 @@ class JSONToCSVApp(MDApp):
             self.show_message("JSON数据为空！")
             return
 
-        # 转换JSON到CSV
-        csv_data = self.convert_json_to_csv(json_data)
+        if not isinstance(json_data, list):
+            self.show_message("JSON数据格式不正确")
+            return
 
-        if csv_data:
-            # 弹出保存对话框
-            self.show_save_dialog(csv_data)
+        # 保存时再逐行写入CSV，不在内存中生成整个文件
+        self.show_save_dialog(json_data)
 
-    def convert_json_to_csv(self, json_data):
-        """将JSON转换为CSV格式"""
+    def convert_json_to_csv(self, json_data, f):
+        """将订单逐行写入CSV文件（每个订单商品一行）"""
         try:
-            if isinstance(json_data, list) and len(json_data) > 0:
-                # 获取所有键作为CSV的标题
-                dict_data = [order.to_dict() for order in json_data]
-                fieldnames = list(dict_data[0].keys())
-
-                # 创建CSV字符串
-                output = StringIO()
-                writer = csv.DictWriter(output, fieldnames=fieldnames)
-
-                writer.writeheader()
-                writer.writerows(dict_data)
-
-                return output.getvalue()
-            else:
-                self.show_message("JSON数据格式不正确")
-                return None
+            write_orders(f, json_data, "items")
+            return True
         except Exception as e:
             self.show_message(f"转换失败: {str(e)}")
-            return None
+            return False
 
-    def show_save_dialog(self, csv_data):
+    def show_save_dialog(self, orders):
         """显示保存对话框"""
-        self.csv_data = csv_data
+        self.orders = orders
 
         self.dialog = MDDialog(
             title="保存CSV文件",
@@ -988,8 +1062,8 @@ class JSONToCSVApp(MDApp):
                 filename = f"orders_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
                 filepath = os.path.join(download_dir, filename)
 
-                with open(filepath, 'w', newline='', encoding='utf-8') as f:
-                    f.write(self.csv_data)
+                with open(filepath, 'w', newline='', encoding='utf-8-sig') as f:
+                    self.convert_json_to_csv(self.orders, f)
 
             except Exception as e:
                 from kivymd.toast import toast
@@ -1013,8 +1087,9 @@ class JSONToCSVApp(MDApp):
                 file_path += '.csv'
 
             try:
-                with open(file_path, 'w', newline='', encoding='utf-8') as f:
-                    f.write(self.csv_data)
+                with open(file_path, 'w', newline='', encoding='utf-8-sig') as f:
+                    if not self.convert_json_to_csv(self.orders, f):
+                        return
                 self.show_message(message=f"文件已保存到: {file_path}")
             except Exception as e:
                 self.show_message(message=f"保存失败: {str(e)}")
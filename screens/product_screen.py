@@ -1,6 +1,4 @@
 from kivy.uix.screenmanager import Screen
-from kivy.uix.scrollview import ScrollView
-from kivy.uix.gridlayout import GridLayout
 from kivy.properties import ListProperty
 from kivymd.uix.boxlayout import MDBoxLayout
 from kivymd.uix.label import MDLabel
@@ -15,7 +13,7 @@ from kivy.metrics import dp, sp
 
 from .assets.config_chinese import CHINESE_FONT_NAME
 from .components.models import ProductCategory
-from .components.product_card import ProductCard
+from .components.product_card import ProductGrid
 
 
 class ProductScreen(Screen):
@@ -24,6 +22,9 @@ class ProductScreen(Screen):
         self.name = "products"
         self._build_ui()
 
+        from kivy.app import App
+        App.get_running_app().cart.subscribe(self.on_cart_changed)
+
     def _build_ui(self):
         # 主布局
         main_layout = MDBoxLayout(orientation='vertical', spacing=dp(10))
@@ -164,22 +165,14 @@ class ProductScreen(Screen):
         # tabs1 = ProductTabs(categories[:])
         # tabs2 = ProductTabs(categories[4:])
 
-        # 商品列表
-        self.product_scroll = ScrollView()
-        self.product_grid = GridLayout(
-            cols=2,
-            spacing=dp(5),
-            padding=dp(5),
-            size_hint_y=None
-        )
-        self.product_grid.bind(minimum_height=self.product_grid.setter('height'))
-        self.product_scroll.add_widget(self.product_grid)
+        # 商品列表（复用视图，只创建可视区域内的卡片）
+        self.product_grid = ProductGrid(cols=2)
 
         main_layout.add_widget(toolbar)
         main_layout.add_widget(search_card)
         # main_layout.add_widget(tabs1)
         # main_layout.add_widget(tabs2)
-        main_layout.add_widget(self.product_scroll)
+        main_layout.add_widget(self.product_grid)
 
         self.add_widget(main_layout)
 
@@ -193,30 +186,17 @@ class ProductScreen(Screen):
         from kivy.app import App
         app = App.get_running_app()
 
-        # 清空现有商品
-        self.product_grid.clear_widgets()
         # 更新购物车徽章显示
         self.update_badge_color_text(app.cart.item_count)
 
-        # 获取商品列表
-        products = app.db.get_products(category=category, featured=featured)
-
-        # 应用搜索筛选
-        search_text = self.search_input.text.strip().lower()
+        # 获取商品列表（有搜索词时通过搜索索引查询）
+        search_text = self.search_input.text.strip()
         if search_text:
-            products = [p for p in products if search_text in p.name.lower() or search_text in p.description.lower()]
-
-        for product in products:
-            card = ProductCard(
-                product_id=product.id,
-                name=product.name,
-                description=product.description,
-                price=product.price,
-                image_url=product.images[0] if product.images else "",
-                rating=product.rating,
-                stock=product.stock
-            )
-            self.product_grid.add_widget(card)
+            products = app.db.search_products(search_text, category=category, featured=featured)
+        else:
+            products = app.db.get_products(category=category, featured=featured)
+
+        self.product_grid.set_products(products)
 
     def show_category_menu(self, *args):
         """获取分类菜单"""
@@ -272,29 +252,16 @@ class ProductScreen(Screen):
         from kivy.app import App
         app = App.get_running_app()
 
-        # 清空现有商品
-        self.product_grid.clear_widgets()
-
         # 获取商品列表
-        products = app.db.get_products()
-        search_text = self.search_input.text.strip().lower()
+        search_text = self.search_input.text.strip()
+        filtered_products = app.db.search_products(search_text) if search_text else app.db.get_products()
 
-        filtered_products = [
-            p for p in products
-            if search_text in str(p.name).lower() or search_text in str(p.category).lower()
-        ]
+        self.product_grid.set_products(filtered_products)
 
-        for product in filtered_products:
-            card = ProductCard(
-                product_id=product.id,
-                name=product.name,
-                description=product.description,
-                price=product.price,
-                image_url=product.images[0] if product.images else "",
-                rating=product.rating,
-                stock=product.stock
-            )
-            self.product_grid.add_widget(card)
+    def on_cart_changed(self, event, product_id):
+        """购物车变化时更新徽章"""
+        from kivy.app import App
+        self.update_badge_color_text(App.get_running_app().cart.item_count)
 
     def update_badge_color_text(self, val):
         if val > 0:
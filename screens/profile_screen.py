@@ -296,7 +296,10 @@ class ProfileScreen(Screen):
             MDSnackbar(MDLabel(text="请填写所有字段", theme_text_color="Custom", text_color=(0.9, 0.2, 0.2, 1))).open()
             return
 
-        if old_pwd != user['password']:
+        from kivy.app import App
+        app = App.get_running_app()
+
+        if not app.user_manager.verify_password(user, old_pwd):
             MDSnackbar(MDLabel(text="旧密码输入错误", theme_text_color="Custom", text_color=(0.6, 0.2, 0.5, 1))).open()
             return
 
@@ -311,12 +314,8 @@ class ProfileScreen(Screen):
 
         dialog.dismiss()
 
-        # 保存新密码
-        user['password'] = new_pwd
-
-        from kivy.app import App
-        app = App.get_running_app()
-        app.user_manager.save_users()
+        # 保存新密码（哈希后保存）
+        app.user_manager.set_password(user, new_pwd)
 
         MDSnackbar(MDLabel(text="密码修改成功", theme_text_color='Custom', text_color=(0.2, 0.8, 0.2, 1)),
                    md_bg_color=(0.8, 0.8, 0.8, 1)).open()
@@ -393,18 +392,23 @@ class ProfileScreen(Screen):
         from kivy.app import App
         app = App.get_running_app()
 
+        # 按修改前的手机号查找用户
+        user = self.search_current_user()
+        if not user:
+            return
+        if not app.user_manager.change_phone(user, phone):
+            MDSnackbar(MDLabel(text="手机号已被其他用户使用", theme_text_color="Custom",
+                               text_color=(0.9, 0.2, 0.2, 1))).open()
+            return
+
         # 更新用户信息
         app.current_user['id'] = '用户_' + name + f'{phone[-4:]}',
         app.current_user['name'] = name
         app.current_user['phone'] = phone
         app.current_user['email'] = email
 
-        # 更新保存信息
-        user = self.search_current_user()
-        if not user:
-            return
+        # 更新保存信息（手机号是用户的主键，修改后整表保存）
         user['name'] = name
-        user['phone'] = phone
         user['email'] = email
         app.user_manager.save_users()
 
@@ -585,7 +589,7 @@ class ProfileScreen(Screen):
 
         from kivy.app import App
         app = App.get_running_app()
-        app.user_manager.save_users()  # 保存
+        app.user_manager.save_user(user)  # 保存
         self.show_addresses()
         return
 
@@ -624,7 +628,7 @@ class ProfileScreen(Screen):
 
         from kivy.app import App
         app = App.get_running_app()
-        app.user_manager.save_users()  # 保存
+        app.user_manager.save_user(user)  # 保存
         self.show_addresses()
         return
 
@@ -691,7 +695,7 @@ class ProfileScreen(Screen):
 
         from kivy.app import App
         app = App.get_running_app()
-        app.user_manager.save_users()  # 保存
+        app.user_manager.save_user(user)  # 保存
         self.show_addresses()
         # app.show_profile()  # 返回
         return
@@ -701,12 +705,7 @@ class ProfileScreen(Screen):
         app = App.get_running_app()
 
         # 查找用户
-        user = None
-        for u in app.user_manager.users:
-            if u["phone"] == app.current_user['phone']:
-                user = u
-                break
-        return user
+        return app.user_manager.get_user(app.current_user['phone'])
 
     def toggle_theme(self, *args):
         """切换主题"""